@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import Optional
 
-from utils.database import get_db
-from utils.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from utils.database import get_async_db
+from utils.security import verify_and_update_password_async, hash_password_async, create_access_token, create_refresh_token
 from utils.config import settings
 from utils.dependencies import get_current_user_from_refresh
 from models.database import UserRole
@@ -45,9 +46,10 @@ class Token(BaseModel):
 
 # 注册接口
 @router.post("/register", response_model=dict, summary="用户注册", description="创建新用户账号，同时创建对应的学生或教师信息")
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     # 验证用户名是否已存在
-    if db.query(User).filter(User.username == request.username).first():
+    result = await db.execute(select(User.id).where(User.username == request.username))
+    if result.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名已存在"
@@ -60,16 +62,15 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
             detail="角色必须是 student 或 teacher"
         )
     
-    # 创建用户
-    hashed_password = get_password_hash(request.password)
+    # 创建用户，密码哈希计算在专用线程池中执行，不阻塞事件循环
+    hashed_password = await hash_password_async(request.password)
     user = User(
         username=request.username,
         password=hashed_password,
         role=request.role
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()  # 获取用户ID
     
     # 创建对应的用户信息
     if request.role == "student":
@@ -96,7 +97,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         )
         db.add(teacher_profile)
     
-    db.commit()
+    await db.commit()
     
     return {"message": "注册成功", "user_id": user.id}
 
@@ -110,7 +111,7 @@ class LoginRequest(BaseModel):
 @router.post("/login", response_model=Token, summary="用户登录", description="验证用户凭据并返回访问令牌")
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # 从请求模型获取参数
@@ -126,16 +127,25 @@ async def login(
             )
         
         # 查找用户
-        user = db.query(User).filter(User.username == username).first()
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
         
-        # 验证用户和密码
-        if not user or not verify_password(password, user.password) or user.role != role:
+        # 验证用户和密码，密码哈希计算在专用线程池中执行，不阻塞事件循环
+        valid, new_hash = (False, None)
+        if user:
+            valid, new_hash = await verify_and_update_password_async(password, user.password)
+        if not valid or user.role != role:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="用户名、密码或角色错误",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # 哈希参数与当前配置不一致时，使用新参数重新保存密码哈希
+        if new_hash:
+            user.password = new_hash
+            await db.commit()
+        
         # 创建访问令牌和刷新令牌
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
@@ -162,7 +172,7 @@ async def login(
         raise
     except Exception as e:
         # 捕获其他所有异常并返回500错误
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"服务器内部错误: {str(e)}"
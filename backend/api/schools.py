@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
 from models.database import School, SchoolMajor
+from utils.database import get_async_db
 from utils.dependencies import get_db
+from utils.http_cache import check_not_modified, make_etag
+from utils.catalog import SCHOOL_FIELDS, async_catalog_school_ids, async_school_payload, async_school_payloads, parse_fields, paginated_response, ndjson_response
 
 router = APIRouter()
 
@@ -44,24 +48,53 @@ class SchoolResponse(BaseModel):
         orm_mode = True
 
 @router.get("/schools", response_model=List[SchoolResponse])
-def get_schools(db: Session = Depends(get_db)):
+async def get_schools(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="每页数量，指定后分页返回，下一页游标在响应头X-Next-Cursor中"),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔，如 id,chinese_name,ranking"),
+    response_format: str = Query("json", alias="format", regex="^(json|ndjson)$", description="响应格式，ndjson为流式导出"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     获取所有学校列表
     """
+    if response_format == "ndjson":
+        return ndjson_response(db, parse_fields(fields, SCHOOL_FIELDS, SCHOOL_FIELDS), cursor, limit)
+    if limit is not None or cursor is not None or fields:
+        return await paginated_response(db, parse_fields(fields, SCHOOL_FIELDS, SCHOOL_FIELDS), cursor, limit or 100)
+    
     try:
-        schools = db.query(School).all()
+        # 优先读取学校目录缓存
+        school_ids = await async_catalog_school_ids(db)
+        payloads = await async_school_payloads(db, school_ids)
+        schools = [payloads[i] for i in school_ids if i in payloads]
+        
+        # 客户端缓存仍有效时返回304；删除学校不会改变其余学校的updated_at，
+        # 最大更新时间无法反映删除，因此列表只使用包含全部学校ID的ETag，不返回Last-Modified
+        etag = make_etag("schools", [(school["id"], school["updated_at"]) for school in schools])
+        not_modified = check_not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
         return schools
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取学校列表失败: {str(e)}")
 
 @router.get("/schools/{school_id}", response_model=SchoolResponse)
-def get_school_detail(school_id: int, db: Session = Depends(get_db)):
+async def get_school_detail(school_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     获取单个学校的详细信息
     """
-    school = db.query(School).filter(School.id == school_id).first()
+    school = await async_school_payload(db, school_id)
     if not school:
         raise HTTPException(status_code=404, detail="学校不存在")
+    
+    # 客户端缓存仍有效时返回304
+    etag = make_etag("school", school["id"], school["updated_at"])
+    not_modified = check_not_modified(request, response, etag, school["updated_at"])
+    if not_modified:
+        return not_modified
     return school
 
 @router.post("/schools", response_model=SchoolResponse)
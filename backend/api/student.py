@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
-from utils.database import get_db
-from utils.dependencies import get_current_student
+from utils.database import get_async_db, get_db
+from utils.dependencies import get_current_student, get_current_student_async
+from utils.http_cache import PRIVATE_CACHE_CONTROL, check_not_modified, make_etag
+from utils.recommendation import recommendation_engine, top_k
+from utils.cache import catalog_cache
+from utils.catalog import async_catalog_school_ids, async_school_payload, async_school_payloads, catalog_school_ids, school_payloads, parse_fields, paginated_response, ndjson_response
+from utils.search import build_match_query, search_index_available, search_school_ids
 from models.database import User, StudentProfile, School, SchoolMajor, SuccessCase, TrainingReservation, DocumentReservation
 from pydantic import BaseModel, Field
 
@@ -49,9 +55,56 @@ class DocumentReserveRequest(BaseModel):
     target_school: Optional[str] = Field(None, description="目标学校", example="哈佛大学")
     notes: Optional[str] = Field(None, description="备注信息", example="希望突出科研经历")
 
+# 预约记录序列化，教师信息通过预加载的关联关系获取，不再逐条查询
+def _teacher_name(reservation) -> str:
+    return reservation.teacher.username if reservation.teacher else '未分配'
+
+def serialize_training_reservation(reservation: TrainingReservation, detail: bool = False) -> dict:
+    data = {
+        "id": reservation.id,
+        "training_type": reservation.training_type or '语言培训',
+        "teacher_id": reservation.teacher_id,
+        "teacher_name": _teacher_name(reservation),
+        "total_hours": reservation.total_hours,
+        "completed_hours": reservation.attended_hours,  # 前端使用completed_hours字段
+        "status": reservation.status,
+        "feedback": reservation.feedback,
+        "created_at": reservation.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if detail:
+        data.update({
+            "notes": reservation.notes,
+            "homework": reservation.homework,
+            "updated_at": reservation.updated_at.strftime("%Y-%m-%d %H:%M:%S") if reservation.updated_at else None
+        })
+    return data
+
+def serialize_document_reservation(reservation: DocumentReservation, detail: bool = False) -> dict:
+    data = {
+        "id": reservation.id,
+        "teacher_id": reservation.teacher_id,
+        "document_type": reservation.document_type,
+        "document_count": reservation.document_count,
+        "target_school": reservation.target_school,
+        "teacher_name": _teacher_name(reservation),
+        "status": reservation.status,
+        "progress": reservation.progress,
+        "revised_content": reservation.revised_content,
+        "created_at": reservation.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if detail:
+        data.update({
+            "document_type": reservation.document_type or '普通文书',
+            "target_school": reservation.target_school or '未指定',
+            "notes": reservation.notes,
+            "comments": reservation.comments,
+            "updated_at": reservation.updated_at.strftime("%Y-%m-%d %H:%M:%S") if reservation.updated_at else None
+        })
+    return data
+
 # 获取个人信息
 @router.get("/profile", response_model=dict, summary="获取个人信息", description="获取当前登录学生的个人详细信息")
-def get_profile(current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
+def get_profile(request: Request, response: Response, current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
     profile = db.query(StudentProfile).filter(StudentProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(
@@ -59,6 +112,12 @@ def get_profile(current_user: User = Depends(get_current_student), db: Session =
             detail="个人信息不存在"
         )
     
+    # 客户端缓存仍有效时返回304
+    etag = make_etag("student_profile", profile.id, profile.updated_at)
+    not_modified = check_not_modified(request, response, etag, profile.updated_at, PRIVATE_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    
     return {
         "id": profile.id,
         "name": profile.name,
@@ -104,9 +163,27 @@ def update_profile(request: StudentProfileUpdate, current_user: User = Depends(g
             detail="更新失败，请稍后重试"
         )
 
+# 由缓存的学校信息构建响应数据，major_keys 指定专业字段的键名
+def _school_item(payload: dict, major_keys=("major_name", "major_rank")) -> dict:
+    name_key, rank_key = major_keys
+    return {
+        "id": payload["id"],
+        "chinese_name": payload["chinese_name"],
+        "english_name": payload["english_name"],
+        "location": payload["location"],
+        "ranking": payload["ranking"],
+        "introduction": payload["introduction"],
+        "details": payload["details"],
+        "majors": [{name_key: name, rank_key: rank} for name, rank in payload["majors"]]
+    }
+
 # 获取学校推荐
 @router.get("/recommendation", response_model=List[SchoolResponse], summary="获取学校推荐", description="基于学生的托福、GRE、GPA成绩和目标地区，推荐合适的留学学校")
-def get_recommendations(current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
+def get_recommendations(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="返回推荐学校数量上限，不指定则返回全部"),
+    current_user: User = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
     # 获取学生信息
     profile = db.query(StudentProfile).filter(StudentProfile.user_id == current_user.id).first()
     if not profile or not (profile.toefl and profile.gre and profile.gpa):
@@ -115,158 +192,125 @@ def get_recommendations(current_user: User = Depends(get_current_student), db: S
             detail="请先完善托福、GRE、GPA成绩信息"
         )
     
-    # 查询符合条件的学校
-    query = db.query(School)
-    if profile.target_region:
-        query = query.filter(School.location.contains(profile.target_region))
-    
-    schools = query.all()
-    results = []
+    # 使用缓存的学校要求快照，一次性计算所有学校的推荐系数（只返回推荐系数≥60的学校）
+    snapshot = recommendation_engine.snapshot(db)
+    scores = snapshot.score_matrix([profile.toefl], [profile.gre], [profile.gpa])[0]
+    selected = top_k(scores, snapshot.region_mask(profile.target_region), limit)
+    if len(selected) == 0:
+        return []
     
-    for school in schools:
-        # 计算推荐系数
-        # 基于学校排名反推录取要求
-        toefl_requirement = 110 - (school.ranking * 0.2) if school.ranking else 90
-        gre_requirement = 330 - (school.ranking * 0.1) if school.ranking else 300
-        gpa_requirement = 3.8 - (school.ranking * 0.002) if school.ranking else 3.5
-        
-        # 计算各项匹配度
-        toefl_score = min(profile.toefl / toefl_requirement * 100, 100)
-        gre_score = min(profile.gre / gre_requirement * 100, 100)
-        gpa_score = min(profile.gpa / gpa_requirement * 100, 100)
-        
-        # 计算最终推荐系数（权重：托福30%+GRE30%+GPA40%）
-        recommendation_score = toefl_score * 0.3 + gre_score * 0.3 + gpa_score * 0.4
-        
-        # 只返回推荐系数≥60的学校
-        if recommendation_score >= 60:
-            # 获取专业信息
-            majors = [
-                {"major_name": major.major_name, "major_rank": major.major_rank}
-                for major in school.majors
-            ]
-            
-            results.append({
-                "id": school.id,
-                "chinese_name": school.chinese_name,
-                "english_name": school.english_name,
-                "location": school.location,
-                "ranking": school.ranking,
-                "introduction": school.introduction,
-                "details": school.details,
-                "majors": majors,
-                "recommendation_score": round(recommendation_score, 2)
-            })
+    # 只获取入选学校及其专业信息，优先读取学校目录缓存
+    school_ids = snapshot.ids[selected].tolist()
+    payloads = school_payloads(db, school_ids)
     
-    # 按推荐系数降序排序
-    results.sort(key=lambda x: x["recommendation_score"], reverse=True)
+    results = []
+    for school_id, index in zip(school_ids, selected):
+        payload = payloads.get(school_id)
+        if payload is None:
+            continue
+        item = _school_item(payload)
+        item["recommendation_score"] = round(float(scores[index]), 2)
+        results.append(item)
     
     return results
 
 # 查找学校
-@router.get("/search-schools", response_model=List[SchoolResponse], summary="查找学校", description="根据学校名称、专业名称或地区搜索学校信息")
+@router.get("/search-schools", response_model=List[SchoolResponse], summary="查找学校", description="根据学校名称、专业名称、地区或全文关键词搜索学校信息，结果按相关度排序")
 def search_schools(
     name: Optional[str] = Query(None, description="学校名称搜索关键词", example="哈佛"),
     major: Optional[str] = Query(None, description="专业名称搜索关键词", example="计算机"),
     region: Optional[str] = Query(None, description="地区搜索关键词", example="美国"),
+    q: Optional[str] = Query(None, description="全文搜索关键词，匹配学校名称、地区、简介和专业", example="常春藤"),
     current_user: User = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
-    query = db.query(School)
+    school_ids = catalog_cache.get_or_load(
+        ("search", name, major, region, q),
+        lambda: _search_school_ids(db, name, major, region, q)
+    )
+    payloads = school_payloads(db, school_ids)
+    return [_school_item(payloads[i]) for i in school_ids if i in payloads]
+
+def _search_school_ids(db: Session, name, major, region, q) -> List[int]:
+    if search_index_available():
+        # 使用全文检索索引，按相关度排序
+        conditions = [
+            build_match_query(keyword, columns)
+            for keyword, columns in (
+                (name, ("chinese_name", "english_name")),
+                (major, ("majors",)),
+                (region, ("location",)),
+                (q, None)
+            )
+            if keyword
+        ]
+        conditions = [c for c in conditions if c]
+        if not conditions:
+            return catalog_school_ids(db)
+        return search_school_ids(db, " AND ".join(f"({c})" for c in conditions))
     
-    # 按名称搜索
+    # 不支持全文检索时退回 LIKE 查询
+    query = db.query(School.id)
     if name:
         query = query.filter(
             (School.chinese_name.contains(name)) |
             (School.english_name.contains(name))
         )
-    
-    # 按地区搜索
     if region:
         query = query.filter(School.location.contains(region))
-    
-    schools = query.all()
-    results = []
-    
-    # 如果按专业搜索，需要进一步过滤
     if major:
-        filtered_schools = []
-        for school in schools:
-            has_major = any(m.major_name.contains(major) for m in school.majors)
-            if has_major:
-                filtered_schools.append(school)
-        schools = filtered_schools
-    
-    for school in schools:
-        majors = [
-            {"major_name": m.major_name, "major_rank": m.major_rank}
-            for m in school.majors
-        ]
-        
-        results.append({
-            "id": school.id,
-            "chinese_name": school.chinese_name,
-            "english_name": school.english_name,
-            "location": school.location,
-            "ranking": school.ranking,
-                "introduction": school.introduction,
-                "details": school.details,
-            "majors": majors
-        })
-    
-    return results
+        query = query.filter(School.majors.any(SchoolMajor.major_name.contains(major)))
+    if q:
+        query = query.filter(
+            (School.chinese_name.contains(q)) |
+            (School.english_name.contains(q)) |
+            (School.location.contains(q)) |
+            (School.introduction.contains(q)) |
+            (School.majors.any(SchoolMajor.major_name.contains(q)))
+        )
+    return [row.id for row in query.order_by(School.id)]
+
+# 学生端学校列表可返回的字段
+STUDENT_SCHOOL_FIELDS = ("id", "chinese_name", "english_name", "location", "ranking", "introduction", "details", "majors")
 
 # 获取学校列表
-@router.get("/schools", response_model=List[SchoolResponse], summary="获取学校列表", description="获取所有学校列表，用于学校推荐和查询")
-def get_schools(current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    # 查询所有学校
-    schools = db.query(School).all()
-    results = []
-    
-    for school in schools:
-        majors = [
-            {"name": m.major_name, "rank": m.major_rank}
-            for m in school.majors
-        ]
-        
-        results.append({
-            "id": school.id,
-            "chinese_name": school.chinese_name,
-            "english_name": school.english_name,
-            "location": school.location,
-            "ranking": school.ranking,
-            "introduction": school.introduction,
-            "details": school.details,
-            "majors": majors
-        })
-    
-    return results
+@router.get("/schools", response_model=List[SchoolResponse], summary="获取学校列表", description="获取所有学校列表，用于学校推荐和查询；支持分页、字段投影和NDJSON流式导出")
+async def get_schools(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="每页数量，指定后分页返回，下一页游标在响应头X-Next-Cursor中"),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔，如 id,chinese_name,majors"),
+    response_format: str = Query("json", alias="format", regex="^(json|ndjson)$", description="响应格式，ndjson为流式导出"),
+    current_user: User = Depends(get_current_student_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if response_format == "ndjson" or limit is not None or cursor is not None or fields:
+        selected = parse_fields(fields, STUDENT_SCHOOL_FIELDS, STUDENT_SCHOOL_FIELDS)
+        if response_format == "ndjson":
+            return ndjson_response(db, selected, cursor, limit)
+        return await paginated_response(db, selected, cursor, limit or 100)
+    
+    # 查询所有学校，优先读取学校目录缓存
+    school_ids = await async_catalog_school_ids(db)
+    payloads = await async_school_payloads(db, school_ids)
+    return [_school_item(payloads[i], ("name", "rank")) for i in school_ids if i in payloads]
 
 # 获取学校详情
 @router.get("/school/{school_id}", response_model=SchoolResponse, summary="获取学校详情", description="根据学校ID获取指定学校的详细信息，包括基本信息和专业设置")
-def get_school_detail(school_id: int, current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    school = db.query(School).filter(School.id == school_id).first()
-    if not school:
+async def get_school_detail(school_id: int, request: Request, response: Response, current_user: User = Depends(get_current_student_async), db: AsyncSession = Depends(get_async_db)):
+    payload = await async_school_payload(db, school_id)
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="学校不存在"
         )
     
-    majors = [
-        {"name": m.major_name, "rank": m.major_rank}
-        for m in school.majors
-    ]
+    # 专业排名变更时会同时更新学校的updated_at，ETag中另外包含专业信息
+    etag = make_etag("student_school", payload["id"], payload["updated_at"], payload["majors"])
+    not_modified = check_not_modified(request, response, etag, payload["updated_at"])
+    if not_modified:
+        return not_modified
     
-    return {
-        "id": school.id,
-        "chinese_name": school.chinese_name,
-            "english_name": school.english_name,
-            "location": school.location,
-            "ranking": school.ranking,
-            "introduction": school.introduction,
-            "details": school.details,
-        "majors": majors
-    }
+    return _school_item(payload, ("name", "rank"))
 
 # 获取成功案例
 @router.get("/success-cases", response_model=List[dict], summary="获取成功案例", description="获取所有留学申请成功案例")
@@ -303,35 +347,20 @@ def reserve_training(request: TrainingReserveRequest, current_user: User = Depen
 # 获取培训预约列表
 @router.get("/training/list", response_model=List[dict], summary="获取培训预约列表", description="获取当前学生的所有语言培训预约记录")
 def get_training_list(current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    reservations = db.query(TrainingReservation).filter(
+    reservations = db.query(TrainingReservation).options(
+        joinedload(TrainingReservation.teacher)
+    ).filter(
         TrainingReservation.student_id == current_user.id
     ).all()
     
-    # 获取教师信息并添加到返回数据中
-    results = []
-    for r in reservations:
-        # 获取教师信息
-        teacher = db.query(User).filter(User.id == r.teacher_id).first()
-        teacher_name = teacher.username if teacher else '未分配'
-        
-        results.append({
-            "id": r.id,
-            "training_type": r.training_type or '语言培训',
-            "teacher_id": r.teacher_id,
-            "teacher_name": teacher_name,
-            "total_hours": r.total_hours,
-            "completed_hours": r.attended_hours,  # 前端使用completed_hours字段
-            "status": r.status,
-            "feedback": r.feedback,
-            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        })
-    
-    return results
+    return [serialize_training_reservation(r) for r in reservations]
 
 # 获取培训预约详情
 @router.get("/training/detail", response_model=dict, summary="获取培训预约详情", description="获取指定ID的语言培训预约详细信息")
 def get_training_detail(id: int, current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    reservation = db.query(TrainingReservation).filter(
+    reservation = db.query(TrainingReservation).options(
+        joinedload(TrainingReservation.teacher)
+    ).filter(
         TrainingReservation.id == id,
         TrainingReservation.student_id == current_user.id
     ).first()
@@ -342,23 +371,7 @@ def get_training_detail(id: int, current_user: User = Depends(get_current_studen
             detail="预约记录不存在"
         )
     
-    # 获取教师信息
-    teacher = db.query(User).filter(User.id == reservation.teacher_id).first()
-    teacher_name = teacher.username if teacher else '未分配'
-    
-    return {
-        "id": reservation.id,
-        "training_type": reservation.training_type or '语言培训',
-        "total_hours": reservation.total_hours,
-        "completed_hours": reservation.attended_hours,
-        "teacher_name": teacher_name,
-        "status": reservation.status,
-        "notes": reservation.notes,
-        "feedback": reservation.feedback,
-        "homework": reservation.homework,
-        "created_at": reservation.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        "updated_at": reservation.updated_at.strftime("%Y-%m-%d %H:%M:%S") if reservation.updated_at else None
-    }
+    return serialize_training_reservation(reservation, detail=True)
 
 # 预约文书润色
 @router.post("/document/reserve", response_model=dict, summary="预约文书润色", description="为当前学生预约文书润色服务，需要指定教师")
@@ -391,35 +404,20 @@ def reserve_document(request: DocumentReserveRequest, current_user: User = Depen
 # 查看文书预约列表
 @router.get("/document/list", response_model=List[dict], summary="获取文书预约列表", description="获取当前学生的所有文书润色预约记录")
 def get_document_list(current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    reservations = db.query(DocumentReservation).filter(
+    reservations = db.query(DocumentReservation).options(
+        joinedload(DocumentReservation.teacher)
+    ).filter(
         DocumentReservation.student_id == current_user.id
     ).all()
     
-    results = []
-    for r in reservations:
-        # 获取教师信息
-        teacher = db.query(User).filter(User.id == r.teacher_id).first()
-        teacher_name = teacher.username if teacher else '未分配'
-        
-        results.append({
-            "id": r.id,
-            "teacher_id": r.teacher_id,
-            "document_type": r.document_type,
-            "document_count": r.document_count,
-            "target_school": r.target_school,
-            "teacher_name": teacher_name,
-            "status": r.status,
-            "progress": r.progress,
-            "revised_content": r.revised_content,
-            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        })
-    
-    return results
+    return [serialize_document_reservation(r) for r in reservations]
 
 # 获取文书预约详情
 @router.get("/document/detail", response_model=dict, summary="获取文书预约详情", description="获取指定ID的文书润色预约详细信息")
 def get_document_detail(id: int, current_user: User = Depends(get_current_student), db: Session = Depends(get_db)):
-    reservation = db.query(DocumentReservation).filter(
+    reservation = db.query(DocumentReservation).options(
+        joinedload(DocumentReservation.teacher)
+    ).filter(
         DocumentReservation.id == id,
         DocumentReservation.student_id == current_user.id
     ).first()
@@ -430,21 +428,4 @@ def get_document_detail(id: int, current_user: User = Depends(get_current_studen
             detail="预约记录不存在"
         )
     
-    # 获取教师信息
-    teacher = db.query(User).filter(User.id == reservation.teacher_id).first()
-    teacher_name = teacher.username if teacher else '未分配'
-    
-    return {
-        "id": reservation.id,
-        "document_type": reservation.document_type or '普通文书',
-        "document_count": reservation.document_count,
-        "target_school": reservation.target_school or '未指定',
-        "teacher_name": teacher_name,
-        "status": reservation.status,
-        "progress": reservation.progress,
-        "revised_content": reservation.revised_content,
-        "notes": reservation.notes,
-        "comments": reservation.comments,
-        "created_at": reservation.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        "updated_at": reservation.updated_at.strftime("%Y-%m-%d %H:%M:%S") if reservation.updated_at else None
-    }
\ No newline at end of file
+    return serialize_document_reservation(reservation, detail=True)
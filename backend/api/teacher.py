@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Path, Request, Response, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
+import io
+import json
+import numpy as np
 
-from utils.database import get_db
+from utils.database import async_engine, engine, get_db, pool_stats
 from utils.dependencies import get_current_teacher
-from models.database import User, TeacherProfile, School, SchoolMajor, TrainingReservation, DocumentReservation, StudentProfile, ReservationStatus
+from utils.http_cache import PRIVATE_CACHE_CONTROL, check_not_modified, make_etag
+from utils.cache import catalog_cache, principal_cache
+from utils.catalog import parse_major_rankings, school_payload, sync_school_majors
+from utils.catalog_io import CATALOG_FORMATS, IMPORT_BATCH_SIZE, detect_format, export_lines, import_catalog, iter_catalog
+from utils.pagination import approximate_count, decode_cursor, encode_cursor
+from utils.admission import AdmissionModel, admission_model
+from utils.recommendation import recommendation_engine, top_k
+from utils.statistics import score_distribution, summary_statistics
+from models.database import User, TeacherProfile, School, TrainingReservation, DocumentReservation, StudentProfile, ReservationStatus, Application, ApplicationStatus
 from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/teacher", tags=["教师服务"])
@@ -47,6 +60,11 @@ class DocumentProgressUpdate(BaseModel):
     reservation_id: int = Field(..., description="预约ID")
     progress: int = Field(..., ge=0, le=100, description="文书完成进度（0-100）")
 
+class MajorRankingItem(BaseModel):
+    """专业排名项"""
+    major_name: str = Field(..., min_length=1, max_length=100, description="专业名称")
+    major_rank: int = Field(..., gt=0, description="专业排名")
+
 class SchoolAddRequest(BaseModel):
     """添加学校请求模型"""
     chinese_name: str = Field(..., description="学校中文名")
@@ -54,6 +72,7 @@ class SchoolAddRequest(BaseModel):
     location: str = Field(..., description="学校位置")
     ranking: int = Field(..., description="学校排名")
     introduction: str = Field("", description="学校简介")
+    majors: Optional[List[MajorRankingItem]] = Field(None, description="专业排名列表，指定时忽略major_rankings")
     major_rankings: str = Field("", description="专业排名，格式：专业名称：排名；专业名称：排名")
     details: str = Field("", description="学校详细信息")
 
@@ -64,12 +83,37 @@ class SchoolUpdateRequest(BaseModel):
     location: Optional[str] = Field(None, description="学校位置")
     ranking: Optional[int] = Field(None, description="学校排名")
     introduction: Optional[str] = Field(None, description="学校简介")
+    majors: Optional[List[MajorRankingItem]] = Field(None, description="专业排名列表，指定时忽略major_rankings")
     major_rankings: Optional[str] = Field(None, description="专业排名，格式：专业名称：排名；专业名称：排名")
     details: Optional[str] = Field(None, description="学校详细信息")
 
+class BatchRecommendationRequest(BaseModel):
+    """批量学校推荐请求模型，指定学生ID列表或按条件筛选学生"""
+    student_ids: Optional[List[int]] = Field(None, description="学生用户ID列表，不指定则按筛选条件选择学生")
+    target_region: Optional[str] = Field(None, description="按学生目标地区筛选")
+    toefl_min: Optional[float] = Field(None, description="最低托福分数")
+    gre_min: Optional[float] = Field(None, description="最低GRE分数")
+    gpa_min: Optional[float] = Field(None, description="最低GPA")
+    top_n: int = Field(10, ge=1, le=100, description="每个学生返回的推荐学校数量")
+
+# 批量推荐每次计算的学生数，控制分数矩阵的内存占用
+BATCH_RECOMMENDATION_CHUNK_SIZE = 256
+
+class BatchPredictionRequest(BaseModel):
+    """批量录取预测请求模型"""
+    student_ids: Optional[List[int]] = Field(None, description="学生用户ID列表，不指定则预测所有学生")
+    school_ids: Optional[List[int]] = Field(None, description="学校ID列表，不指定则预测所有学校")
+
+class ApplicationCreate(BaseModel):
+    """留学申请记录请求模型"""
+    student_id: int = Field(..., description="学生用户ID")
+    school_id: int = Field(..., description="申请学校ID")
+    major_name: Optional[str] = Field(None, description="申请专业")
+    status: ApplicationStatus = Field(ApplicationStatus.PENDING, description="申请结果：pending、admitted 或 rejected")
+
 # 获取个人信息
 @router.get("/profile", response_model=dict, summary="获取教师个人信息", description="获取当前登录教师的个人基本信息")
-def get_profile(current_user: User = Depends(get_current_teacher), db: Session = Depends(get_db)):
+def get_profile(request: Request, response: Response, current_user: User = Depends(get_current_teacher), db: Session = Depends(get_db)):
     profile = db.query(TeacherProfile).filter(TeacherProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(
@@ -77,6 +121,12 @@ def get_profile(current_user: User = Depends(get_current_teacher), db: Session =
             detail="个人信息不存在"
         )
     
+    # 客户端缓存仍有效时返回304
+    etag = make_etag("teacher_profile", profile.id, profile.updated_at)
+    not_modified = check_not_modified(request, response, etag, profile.updated_at, PRIVATE_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    
     return {
         "id": profile.id,
         "name": profile.name,
@@ -105,50 +155,26 @@ def update_profile(request: TeacherProfileUpdate, current_user: User = Depends(g
     return {"message": "个人信息更新成功"}
 
 # 获取学生统计信息
-@router.get("/statistics/student", response_model=dict, summary="获取学生统计信息", description="获取教师相关的学生统计数据")
-def get_student_statistics(current_user: User = Depends(get_current_teacher), db: Session = Depends(get_db)):
-    # 获取所有学生
-    student_profiles = db.query(StudentProfile).all()
-    
-    if not student_profiles:
-        return {
-            "total_count": 0,
-            "male_count": 0,
-            "female_count": 0,
-            "average_toefl": 0,
-            "average_gre": 0,
-            "average_gpa": 0
-        }
-    
-    # 统计数据
-    total_count = len(student_profiles)
-    male_count = sum(1 for p in student_profiles if p.gender == "男")
-    female_count = sum(1 for p in student_profiles if p.gender == "女")
-    
-    # 计算平均分
-    toefl_scores = [p.toefl for p in student_profiles if p.toefl]
-    gre_scores = [p.gre for p in student_profiles if p.gre]
-    gpa_scores = [p.gpa for p in student_profiles if p.gpa]
-    
-    average_toefl = sum(toefl_scores) / len(toefl_scores) if toefl_scores else 0
-    average_gre = sum(gre_scores) / len(gre_scores) if gre_scores else 0
-    average_gpa = sum(gpa_scores) / len(gpa_scores) if gpa_scores else 0
-    
-    return {
-        "total_count": total_count,
-        "male_count": male_count,
-        "female_count": female_count,
-        "average_toefl": round(average_toefl, 2),
-        "average_gre": round(average_gre, 2),
-        "average_gpa": round(average_gpa, 2)
-    }
+@router.get("/statistics/student", response_model=dict, summary="获取学生统计信息", description="获取教师相关的学生统计数据，可选返回托福、GRE、GPA成绩的直方图和百分位（百分位由直方图估算）")
+def get_student_statistics(
+    include_distribution: bool = Query(False, description="是否返回成绩直方图和百分位"),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    # 读取随学生信息变更增量更新的统计汇总，耗时与学生人数无关
+    result = summary_statistics(db)
+    if include_distribution:
+        result["distribution"] = score_distribution(db)
+    return result
 
 # 获取学生列表
-@router.get("/students/list", response_model=dict, summary="获取学生列表", description="获取教师负责的学生列表，支持分页和搜索")
+@router.get("/students/list", response_model=dict, summary="获取学生列表", description="获取教师负责的学生列表，支持分页和搜索；传入cursor参数时使用游标分页")
 def get_students_list(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索关键词"),
+    cursor: Optional[str] = Query(None, description="分页游标，传入上一页返回的next_cursor；传空字符串获取游标分页的第一页"),
+    include_total: bool = Query(False, description="游标分页时是否返回近似总数（短时缓存）"),
     current_user: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
@@ -159,9 +185,26 @@ def get_students_list(
     if search:
         query = query.filter(
             (StudentProfile.name.like(f"%{search}%")) | 
-            (User.email.like(f"%{search}%"))
+            (StudentProfile.email.like(f"%{search}%"))
         )
     
+    # 游标分页：按学生信息ID排序，不执行OFFSET和COUNT
+    if cursor is not None:
+        after = decode_cursor(cursor, 1)
+        # 总数按未加游标条件的查询统计，否则翻页后缓存的是剩余行数
+        total_count = approximate_count(("students", search), query.count) if include_total else None
+        if after is not None:
+            query = query.filter(StudentProfile.id > after[0])
+        rows = query.order_by(StudentProfile.id).limit(page_size + 1).all()
+        students = rows[:page_size]
+        next_cursor = encode_cursor([students[-1].id]) if len(rows) > page_size else None
+        
+        return {
+            "students": [_serialize_student(student) for student in students],
+            "next_cursor": next_cursor,
+            "total_count": total_count
+        }
+    
     # 计算总数
     total_count = query.count()
     total_pages = (total_count + page_size - 1) // page_size
@@ -172,36 +215,76 @@ def get_students_list(
     
     # 构建响应
     return {
-        "students": [
-            {
-                "id": student.user_id,
-                "name": student.name,
-                "gender": student.gender,
-                "toefl": student.toefl,
-                "gre": student.gre,
-                "gpa": student.gpa,
-                "target_region": student.target_region
-            }
-            for student in students
-        ],
+        "students": [_serialize_student(student) for student in students],
         "total_pages": total_pages,
         "current_page": page,
         "total_count": total_count
     }
 
+def _serialize_student(student: StudentProfile) -> dict:
+    return {
+        "id": student.user_id,
+        "name": student.name,
+        "gender": student.gender,
+        "toefl": student.toefl,
+        "gre": student.gre,
+        "gpa": student.gpa,
+        "target_region": student.target_region
+    }
+
+def _require_admission_model() -> AdmissionModel:
+    model = admission_model()
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="录取预测模型尚未训练，请先录入申请结果并执行 python -m utils.admission train"
+        )
+    return model
+
+# 尚未训练录取预测模型时使用的经验规则：基础成功率50%，成绩达到常见录取线时提高
+def _heuristic_success_rate(toefl: Optional[float], gre: Optional[float], gpa: Optional[float]) -> float:
+    score_bonus = 0
+    if toefl and toefl >= 100:
+        score_bonus += 0.2
+    if gre and gre >= 320:
+        score_bonus += 0.2
+    if gpa and gpa >= 3.5:
+        score_bonus += 0.1
+    return min(0.5 + score_bonus, 0.95)
+
 # 留学成功率预测
-@router.get("/statistics/predict", response_model=dict, summary="预测留学成功率", description="根据学生信息预测申请指定学校的成功率")
+@router.get("/statistics/predict", response_model=dict, summary="预测留学成功率", description="根据学生成绩预测申请指定学校的录取概率；不指定学校时返回所有学校的平均录取概率")
 def predict_success_rate(
-    toefl_min: Optional[float] = Query(None, description="最低托福分数"),
-    gre_min: Optional[float] = Query(None, description="最低GRE分数"),
-    gpa_min: Optional[float] = Query(None, description="最低GPA"),
+    toefl_min: Optional[float] = Query(None, description="托福分数"),
+    gre_min: Optional[float] = Query(None, description="GRE分数"),
+    gpa_min: Optional[float] = Query(None, description="GPA"),
+    school_id: Optional[int] = Query(None, description="目标学校ID"),
     current_user: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
-    # 模拟历史申请数据（实际应该有专门的applications表）
-    # 这里简单地根据学生分数进行模拟计算
-    query = db.query(StudentProfile)
+    model = admission_model()
+    snapshot = recommendation_engine.snapshot(db)
     
+    # 使用模型计算录取概率，未提供的成绩按训练样本均值处理；尚未训练模型时使用经验规则
+    if school_id is not None:
+        index = int(np.searchsorted(snapshot.ids, school_id))
+        if index >= len(snapshot.ids) or snapshot.ids[index] != school_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="学校不存在"
+            )
+        rankings = snapshot.rankings[index:index + 1]
+    else:
+        rankings = snapshot.rankings
+    if model is not None:
+        toefl, gre, gpa = ([np.nan if value is None else value] for value in (toefl_min, gre_min, gpa_min))
+        probabilities = model.score_matrix(toefl, gre, gpa, rankings)[0]
+        success_rate = float(probabilities.mean()) if probabilities.size else 0.0
+    else:
+        success_rate = _heuristic_success_rate(toefl_min, gre_min, gpa_min)
+    
+    # 统计成绩不低于给定分数的学生人数
+    query = db.query(func.count(StudentProfile.id))
     if toefl_min:
         query = query.filter(StudentProfile.toefl >= toefl_min)
     if gre_min:
@@ -209,27 +292,184 @@ def predict_success_rate(
     if gpa_min:
         query = query.filter(StudentProfile.gpa >= gpa_min)
     
-    qualified_students = query.count()
-    total_students = db.query(StudentProfile).count()
-    
-    # 基于分数计算成功率（模拟）
-    base_rate = 0.5
-    score_bonus = 0
+    return {
+        "qualified_students": query.scalar(),
+        "total_students": summary_statistics(db)["total_count"],
+        "success_rate": round(success_rate * 100, 2),  # 转换为百分比
+        "school_id": school_id,
+        "model_version": model.version if model is not None else None
+    }
+
+# 批量录取预测
+@router.post("/statistics/predict/batch", summary="批量录取预测", description="为多个学生批量预测申请多所学校的录取概率，按行流式返回每个学生的结果（NDJSON）")
+def batch_predict(
+    request: BatchPredictionRequest,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    model = _require_admission_model()
+    snapshot = recommendation_engine.snapshot(db)
+    
+    # 选择要预测的学校
+    if request.school_ids is not None:
+        selected = np.flatnonzero(np.isin(snapshot.ids, request.school_ids))
+    else:
+        selected = np.arange(len(snapshot.ids))
+    school_ids = snapshot.ids[selected].tolist()
+    rankings = snapshot.rankings[selected]
+    
+    query = db.query(StudentProfile.user_id, StudentProfile.name, StudentProfile.toefl, StudentProfile.gre, StudentProfile.gpa)
+    if request.student_ids is not None:
+        query = query.filter(StudentProfile.user_id.in_(request.student_ids))
+    students = query.order_by(StudentProfile.user_id).all()
+    
+    def generate():
+        for start in range(0, len(students), BATCH_RECOMMENDATION_CHUNK_SIZE):
+            chunk = students[start:start + BATCH_RECOMMENDATION_CHUNK_SIZE]
+            scored = [s for s in chunk if s.toefl and s.gre and s.gpa]
+            
+            # 一次性计算本批 学生 × 学校 的录取概率矩阵
+            probabilities = {}
+            if scored:
+                matrix = model.score_matrix(
+                    [s.toefl for s in scored],
+                    [s.gre for s in scored],
+                    [s.gpa for s in scored],
+                    rankings
+                )
+                probabilities = {student.user_id: matrix[row] for row, student in enumerate(scored)}
+            
+            for student in chunk:
+                line = {
+                    "student_id": student.user_id,
+                    "student_name": student.name,
+                    "model_version": model.version,
+                    "predictions": []
+                }
+                if student.user_id not in probabilities:
+                    line["detail"] = "托福、GRE、GPA成绩信息不完整"
+                else:
+                    line["predictions"] = [
+                        {"school_id": school_id, "success_rate": round(float(p) * 100, 2)}
+                        for school_id, p in zip(school_ids, probabilities[student.user_id])
+                    ]
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# 录入留学申请结果
+@router.post("/applications", response_model=dict, summary="录入申请结果", description="录入学生的留学申请及录取结果，保存申请时的成绩，用于训练录取预测模型")
+def create_application(request: ApplicationCreate, current_user: User = Depends(get_current_teacher), db: Session = Depends(get_db)):
+    profile = db.query(StudentProfile).filter(StudentProfile.user_id == request.student_id).first()
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="学生不存在"
+        )
+    if not db.query(School.id).filter(School.id == request.school_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="学校不存在"
+        )
     
-    if toefl_min and toefl_min >= 100:
-        score_bonus += 0.2
-    if gre_min and gre_min >= 320:
-        score_bonus += 0.2
-    if gpa_min and gpa_min >= 3.5:
-        score_bonus += 0.1
+    application = Application(
+        student_id=request.student_id,
+        school_id=request.school_id,
+        major_name=request.major_name,
+        toefl=profile.toefl,
+        gre=profile.gre,
+        gpa=profile.gpa,
+        status=request.status
+    )
+    db.add(application)
+    db.commit()
     
-    success_rate = min(base_rate + score_bonus, 0.95)
+    return {"message": "申请记录已保存", "id": application.id}
+
+# 批量学校推荐
+@router.post("/recommendation/batch", summary="批量学校推荐", description="为多个学生批量计算学校推荐，按行流式返回每个学生的前N所推荐学校（NDJSON）")
+def batch_recommendations(
+    request: BatchRecommendationRequest,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    query = db.query(
+        StudentProfile.user_id,
+        StudentProfile.name,
+        StudentProfile.target_region,
+        StudentProfile.toefl,
+        StudentProfile.gre,
+        StudentProfile.gpa
+    )
     
-    return {
-        "qualified_students": qualified_students,
-        "total_students": total_students,
-        "success_rate": round(success_rate * 100, 2)  # 转换为百分比
-    }
+    # 应用筛选条件
+    if request.student_ids is not None:
+        query = query.filter(StudentProfile.user_id.in_(request.student_ids))
+    if request.target_region:
+        query = query.filter(StudentProfile.target_region.contains(request.target_region))
+    if request.toefl_min:
+        query = query.filter(StudentProfile.toefl >= request.toefl_min)
+    if request.gre_min:
+        query = query.filter(StudentProfile.gre >= request.gre_min)
+    if request.gpa_min:
+        query = query.filter(StudentProfile.gpa >= request.gpa_min)
+    
+    students = query.order_by(StudentProfile.user_id).all()
+    snapshot = recommendation_engine.snapshot(db)
+    
+    def generate():
+        for start in range(0, len(students), BATCH_RECOMMENDATION_CHUNK_SIZE):
+            chunk = students[start:start + BATCH_RECOMMENDATION_CHUNK_SIZE]
+            scored = [s for s in chunk if s.toefl and s.gre and s.gpa]
+            
+            # 一次性计算本批 学生 × 学校 的推荐系数矩阵
+            selections = {}
+            if scored:
+                scores = snapshot.score_matrix(
+                    [s.toefl for s in scored],
+                    [s.gre for s in scored],
+                    [s.gpa for s in scored]
+                )
+                for row, student in enumerate(scored):
+                    selected = top_k(scores[row], snapshot.region_mask(student.target_region), request.top_n)
+                    selections[student.user_id] = [
+                        (int(snapshot.ids[index]), round(float(scores[row, index]), 2))
+                        for index in selected
+                    ]
+            
+            # 只查询本批入选学校的基本信息
+            school_ids = {school_id for selected in selections.values() for school_id, _ in selected}
+            schools = {}
+            if school_ids:
+                rows = db.query(
+                    School.id, School.chinese_name, School.english_name, School.location, School.ranking
+                ).filter(School.id.in_(school_ids)).all()
+                schools = {row.id: row for row in rows}
+            
+            for student in chunk:
+                line = {
+                    "student_id": student.user_id,
+                    "student_name": student.name,
+                    "recommendations": []
+                }
+                if student.user_id not in selections:
+                    line["detail"] = "托福、GRE、GPA成绩信息不完整"
+                else:
+                    for school_id, score in selections[student.user_id]:
+                        school = schools.get(school_id)
+                        if school is None:
+                            continue
+                        line["recommendations"].append({
+                            "id": school.id,
+                            "chinese_name": school.chinese_name,
+                            "english_name": school.english_name,
+                            "location": school.location,
+                            "ranking": school.ranking,
+                            "recommendation_score": score
+                        })
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 # 语言培训相关
 
@@ -262,16 +502,16 @@ def get_document_list(
     # 按创建时间倒序排列
     query = query.order_by(DocumentReservation.created_at.desc())
     
-    # 获取结果
-    document_reservations = query.all()
+    # 获取结果，一次性预加载学生及其个人信息，避免逐条查询
+    document_reservations = query.options(
+        selectinload(DocumentReservation.student).selectinload(User.student_profile)
+    ).all()
     
     # 构建响应数据
     result = []
     for doc in document_reservations:
         # 获取学生信息
-        student_profile = db.query(StudentProfile).join(User).filter(
-            User.id == doc.student_id
-        ).first()
+        student_profile = doc.student.student_profile if doc.student else None
         
         result.append({
             "id": doc.id,
@@ -356,17 +596,16 @@ def get_training_list(
         ).subquery()
         query = query.filter(TrainingReservation.student_id.in_(student_ids))
     
-    # 执行查询
-    reservations = query.all()
+    # 执行查询，一次性预加载学生及其个人信息，避免逐条查询
+    reservations = query.options(
+        selectinload(TrainingReservation.student).selectinload(User.student_profile)
+    ).all()
     
     # 构建响应数据
     result = []
     for reservation in reservations:
         # 获取学生信息
-        student = db.query(User).filter(User.id == reservation.student_id).first()
-        student_profile = None
-        if student:
-            student_profile = db.query(StudentProfile).filter(StudentProfile.user_id == student.id).first()
+        student_profile = reservation.student.student_profile if reservation.student else None
         
         # 构建学生成绩信息
         student_scores = {}
@@ -697,40 +936,49 @@ def update_document_progress(request: DocumentProgressUpdate, current_user: User
 # 获取学校详情
 @router.get("/school/detail", response_model=dict, summary="获取学校详情", description="获取指定学校的详细信息，包括专业排名")
 def get_school_detail(
+    request: Request,
+    response: Response,
     school_id: int = Query(..., description="学校ID"),
     current_user: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
-    # 查找学校
-    school = db.query(School).filter(School.id == school_id).first()
+    # 查找学校，优先读取学校目录缓存
+    school = school_payload(db, school_id)
     if not school:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="学校不存在"
         )
     
+    # 专业排名变更时会同时更新学校的updated_at，ETag中另外包含专业信息
+    etag = make_etag("teacher_school", school["id"], school["updated_at"], school["majors"])
+    not_modified = check_not_modified(request, response, etag, school["updated_at"])
+    if not_modified:
+        return not_modified
+    
     # 获取学校的专业排名
-    majors = db.query(SchoolMajor).filter(SchoolMajor.school_id == school_id).all()
-    major_rankings_str = "；".join([f"{major.major_name}：{major.major_rank}" for major in majors])
+    major_rankings_str = "；".join([f"{major_name}：{major_rank}" for major_name, major_rank in school["majors"]])
     
     # 返回详情
     return {
-        "id": school.id,
-        "chinese_name": school.chinese_name,
-        "english_name": school.english_name,
-        "location": school.location,
-        "ranking": school.ranking,
-        "introduction": school.introduction,
-        "details": school.details,
+        "id": school["id"],
+        "chinese_name": school["chinese_name"],
+        "english_name": school["english_name"],
+        "location": school["location"],
+        "ranking": school["ranking"],
+        "introduction": school["introduction"],
+        "details": school["details"],
         "major_rankings": major_rankings_str
     }
 
 # 获取学校列表
-@router.get("/school/list", response_model=dict, summary="获取学校列表", description="分页获取学校列表，支持搜索功能")
+@router.get("/school/list", response_model=dict, summary="获取学校列表", description="分页获取学校列表，支持搜索功能；传入cursor参数时按排名使用游标分页")
 def get_school_list(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索关键词"),
+    cursor: Optional[str] = Query(None, description="分页游标，传入上一页返回的next_cursor；传空字符串获取游标分页的第一页"),
+    include_total: bool = Query(False, description="游标分页时是否返回近似总数（短时缓存）"),
     current_user: User = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
@@ -745,6 +993,29 @@ def get_school_list(
             (School.location.like(f"%{search}%"))
         )
     
+    # 游标分页：按(排名, ID)排序，无排名的学校排在最前
+    if cursor is not None:
+        ranking_key = func.coalesce(School.ranking, 0)
+        after = decode_cursor(cursor, 2)
+        # 总数按未加游标条件的查询统计，否则翻页后缓存的是剩余行数
+        total_count = approximate_count(("schools", search), query.count) if include_total else None
+        if after is not None:
+            query = query.filter(or_(
+                ranking_key > after[0],
+                and_(ranking_key == after[0], School.id > after[1])
+            ))
+        rows = query.order_by(ranking_key, School.id).limit(page_size + 1).all()
+        schools = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size:
+            next_cursor = encode_cursor([schools[-1].ranking or 0, schools[-1].id])
+        
+        return {
+            "schools": [_serialize_school_summary(school) for school in schools],
+            "next_cursor": next_cursor,
+            "total_count": total_count
+        }
+    
     # 计算总数
     total_count = query.count()
     total_pages = (total_count + page_size - 1) // page_size
@@ -755,21 +1026,21 @@ def get_school_list(
     
     # 构建响应
     return {
-        "schools": [
-            {
-                "id": school.id,
-                "chinese_name": school.chinese_name,
-                "english_name": school.english_name,
-                "location": school.location,
-                "ranking": school.ranking
-            }
-            for school in schools
-        ],
+        "schools": [_serialize_school_summary(school) for school in schools],
         "total_pages": total_pages,
         "current_page": page,
         "total_count": total_count
     }
 
+def _serialize_school_summary(school: School) -> dict:
+    return {
+        "id": school.id,
+        "chinese_name": school.chinese_name,
+        "english_name": school.english_name,
+        "location": school.location,
+        "ranking": school.ranking
+    }
+
 # 添加学校
 @router.post("/school/add", response_model=dict, summary="添加新学校", description="添加新的学校信息，包括学校基本信息和专业排名")
 def add_school(request: SchoolAddRequest, current_user: User = Depends(get_current_teacher), db: Session = Depends(get_db)):
@@ -795,24 +1066,12 @@ def add_school(request: SchoolAddRequest, current_user: User = Depends(get_curre
     db.add(school)
     db.flush()  # 获取学校ID
     
-    # 处理专业排名信息
-    if request.major_rankings:
-        # 解析专业排名字符串，格式如："计算机：10；商科：20；工程：15"
-        major_pairs = request.major_rankings.split("；")
-        for pair in major_pairs:
-            if "：" in pair:
-                try:
-                    major_name, major_rank_str = pair.split("：")
-                    major_rank = int(major_rank_str.strip())
-                    major = SchoolMajor(
-                        school_id=school.id,
-                        major_name=major_name.strip(),
-                        major_rank=major_rank
-                    )
-                    db.add(major)
-                except (ValueError, IndexError):
-                    # 跳过无效格式的专业排名
-                    continue
+    # 处理专业排名信息，结构化列表优先于专业排名字符串
+    if request.majors is not None:
+        majors = [(major.major_name.strip(), major.major_rank) for major in request.majors]
+    else:
+        majors = parse_major_rankings(request.major_rankings)
+    sync_school_majors(db, school.id, majors)
     
     db.commit()
     
@@ -830,35 +1089,64 @@ def update_school(school_id: int = Path(..., description="学校ID"), request: S
     
     # 更新字段
     update_data = request.dict(exclude_unset=True)
+    majors = update_data.pop("majors", None)
+    has_major_rankings = "major_rankings" in update_data
+    major_rankings = update_data.pop("major_rankings", None)
     for field, value in update_data.items():
         setattr(school, field, value)
     
-    # 处理专业排名
-    if 'major_rankings' in update_data:
-        major_rankings = update_data['major_rankings']
-        # 清除现有专业排名
-        db.query(SchoolMajor).filter(SchoolMajor.school_id == school_id).delete()
-        # 添加新的专业排名
-        if major_rankings:
-            major_pairs = major_rankings.split("；")
-            for pair in major_pairs:
-                if "：" in pair:
-                    try:
-                        major_name, major_rank_str = pair.split("：")
-                        major_rank = int(major_rank_str.strip())
-                        major = SchoolMajor(
-                            school_id=school.id,
-                            major_name=major_name.strip(),
-                            major_rank=major_rank
-                        )
-                        db.add(major)
-                    except (ValueError, IndexError):
-                        # 跳过无效格式的专业排名
-                        continue
+    # 处理专业排名：与现有专业比较，只写入有变化的行
+    major_changes = None
+    if majors is not None:
+        major_changes = sync_school_majors(db, school_id, [(major["major_name"].strip(), major["major_rank"]) for major in majors])
+    elif has_major_rankings:
+        major_changes = sync_school_majors(db, school_id, parse_major_rankings(major_rankings))
     
     db.commit()
     
-    return {"message": "学校信息更新成功"}
+    return {"message": "学校信息更新成功", "major_changes": major_changes}
+
+# 批量导入学校目录
+@router.post("/school/import", response_model=dict, summary="批量导入学校", description="上传CSV或JSON Lines文件，按英文名批量新增或更新学校及专业排名，每批单独提交；返回新增、更新数量和错误行")
+def import_schools(
+    file: UploadFile = File(..., description="CSV或JSON Lines文件（UTF-8编码）"),
+    file_format: Optional[str] = Query(None, alias="format", regex="^(csv|jsonl)$", description="文件格式，默认按文件扩展名判断"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=5000, description="每批写入并提交的行数"),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    file_format = file_format or detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"无法判断文件格式，请指定format参数：{'/'.join(CATALOG_FORMATS)}"
+        )
+    
+    # 上传文件逐行读取，不整体载入内存
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = import_catalog(db, lines, file_format, batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="文件须为UTF-8编码，出错前的批次已导入"
+        )
+    
+    return {"message": "学校导入完成", **result}
+
+# 导出学校目录
+@router.get("/school/export", summary="导出学校目录", description="按行流式导出全部学校及专业排名，格式与批量导入一致")
+def export_schools(
+    file_format: str = Query("jsonl", alias="format", regex="^(csv|jsonl)$", description="导出格式"),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    media_type = "text/csv; charset=utf-8" if file_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_lines(iter_catalog(db), file_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=schools.{file_format}"}
+    )
 
 # 删除学校
 @router.delete("/school/delete", response_model=dict, summary="删除学校", description="删除指定的学校信息")
@@ -873,4 +1161,20 @@ def delete_school(school_id: int = Query(..., description="学校ID"), current_u
     db.delete(school)
     db.commit()
     
-    return {"message": "学校删除成功"}
\ No newline at end of file
+    return {"message": "学校删除成功"}
+
+# 缓存统计
+@router.get("/system/cache", response_model=dict, summary="获取缓存统计", description="获取学校目录缓存和认证用户缓存的容量、命中和未命中次数")
+def get_cache_stats(current_user: User = Depends(get_current_teacher)):
+    return {
+        "catalog": catalog_cache.stats(),
+        "principal": principal_cache.stats()
+    }
+
+# 数据库连接池统计
+@router.get("/system/pool", response_model=dict, summary="获取连接池统计", description="获取同步和异步数据库连接池的容量、当前占用、峰值、等待和超时次数，用于按工作进程数调整连接池大小")
+def get_pool_stats(current_user: User = Depends(get_current_teacher)):
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine)
+    }
@@ -0,0 +1,59 @@
+"""
+密码哈希迭代次数校准脚本
+
+在当前机器上测量 pbkdf2_sha256 的验证耗时，按目标耗时推算迭代次数，并列出各档位的实际耗时。
+将输出的迭代次数写入 .env 的 PASSWORD_HASH_ROUNDS 即可生效，已有用户会在下次登录时自动重新哈希。
+
+用法：
+    python benchmark_kdf.py --target-ms 100
+"""
+import argparse
+import time
+
+from passlib.hash import pbkdf2_sha256
+
+from utils.security import PASSWORD_HASH_PROFILES
+
+# 用于测量的密码
+SAMPLE_PASSWORD = "BenchPass123"
+
+
+def measure(rounds, repeat):
+    """返回指定迭代次数下单次验证耗时（秒），取多次测量的最小值"""
+    hashed = pbkdf2_sha256.using(rounds=rounds).hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pbkdf2_sha256.verify(SAMPLE_PASSWORD, hashed)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate(target, repeat):
+    """按线性关系推算达到目标耗时的迭代次数，再实测修正一次"""
+    rounds = 10000
+    elapsed = measure(rounds, repeat)
+    for _ in range(2):
+        rounds = max(1000, int(rounds * target / elapsed))
+        elapsed = measure(rounds, repeat)
+    # 取整到千位，便于配置
+    return max(1000, round(rounds, -3)), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="校准密码哈希迭代次数")
+    parser.add_argument("--target-ms", type=float, default=100, help="单次密码验证的目标耗时（毫秒）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个迭代次数的测量次数")
+    args = parser.parse_args()
+
+    print("当前档位耗时：")
+    for name, rounds in PASSWORD_HASH_PROFILES.items():
+        print(f"  {name:<8} {rounds:>8} 次  {measure(rounds, args.repeat) * 1000:8.1f}ms")
+
+    rounds, elapsed = calibrate(args.target_ms / 1000, args.repeat)
+    print(f"\n目标耗时 {args.target_ms:g}ms，建议迭代次数 {rounds}（实测 {elapsed * 1000:.1f}ms）")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
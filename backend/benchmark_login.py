@@ -0,0 +1,106 @@
+"""
+登录负载测试脚本
+
+在并发登录的同时持续请求 /health，统计两者的延迟分位数。
+密码哈希不阻塞事件循环时，/health 的 p99 应保持在毫秒级，不随登录并发数上升。
+
+用法（需先启动后端服务）：
+    python benchmark_login.py --concurrency 16 --duration 20
+"""
+import argparse
+import threading
+import time
+import uuid
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(name, latencies, errors):
+    print(
+        f"{name:<8} 请求数 {len(latencies):>6}  失败 {errors:>4}  "
+        f"p50 {percentile(latencies, 50) * 1000:8.1f}ms  "
+        f"p95 {percentile(latencies, 95) * 1000:8.1f}ms  "
+        f"p99 {percentile(latencies, 99) * 1000:8.1f}ms"
+    )
+
+
+def create_user(base_url):
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "BenchPass123"
+    response = requests.post(f"{base_url}/auth/register", json={
+        "username": username,
+        "password": password,
+        "role": "student",
+        "name": "压测用户",
+        "email": "bench@example.com",
+        "phone": "13800138000"
+    })
+    response.raise_for_status()
+    return {"username": username, "password": password, "role": "student"}
+
+
+def run_worker(url, method, body, deadline, latencies, errors, lock):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, json=body, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[0] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录负载测试")
+    parser.add_argument("--base-url", default=BASE_URL, help="后端服务地址")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发登录线程数")
+    parser.add_argument("--probes", type=int, default=2, help="并发请求 /health 的线程数")
+    parser.add_argument("--duration", type=float, default=20, help="测试时长（秒）")
+    args = parser.parse_args()
+
+    credentials = create_user(args.base_url)
+    deadline = time.perf_counter() + args.duration
+    lock = threading.Lock()
+    results = {
+        "login": ([], [0]),
+        "health": ([], [0])
+    }
+
+    threads = []
+    for _ in range(args.concurrency):
+        threads.append(threading.Thread(target=run_worker, args=(
+            f"{args.base_url}/auth/login", "POST", credentials, deadline, *results["login"], lock
+        )))
+    for _ in range(args.probes):
+        threads.append(threading.Thread(target=run_worker, args=(
+            f"{args.base_url}/health", "GET", None, deadline, *results["health"], lock
+        )))
+
+    print(f"并发登录 {args.concurrency}，探测线程 {args.probes}，持续 {args.duration:g} 秒...")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, (latencies, errors) in results.items():
+        summarize(name, latencies, errors[0])
+
+
+if __name__ == "__main__":
+    main()
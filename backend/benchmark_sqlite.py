@@ -0,0 +1,129 @@
+"""
+SQLite 读写并发测试脚本
+
+在临时数据库上同时运行写线程（模拟预约写入）和读线程（模拟列表查询），
+分别使用 SQLite 默认参数（回滚日志）和配置中的参数（WAL 等）运行，对比吞吐量和读延迟。
+
+用法：
+    python benchmark_sqlite.py --writers 4 --readers 8 --duration 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+
+from utils.database import create_database_engine, sqlite_pragmas
+
+# SQLite 默认参数（回滚日志、FULL同步）
+DEFAULT_PRAGMAS = {
+    "foreign_keys": "ON",
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout": 5000
+}
+
+# 预先写入的行数
+SEED_ROWS = 20000
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def prepare(engine):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE reservations ("
+            "id INTEGER PRIMARY KEY, teacher_id INTEGER, status TEXT, content TEXT, created_at REAL)"
+        ))
+        connection.execute(text("CREATE INDEX ix_reservations_teacher ON reservations (teacher_id, created_at)"))
+        connection.execute(
+            text("INSERT INTO reservations (teacher_id, status, content, created_at) VALUES (:t, 'pending', :c, :ts)"),
+            [{"t": i % 50, "c": "x" * 200, "ts": time.time()} for i in range(SEED_ROWS)]
+        )
+
+
+def writer(engine, deadline, stats, lock):
+    count, errors = 0, 0
+    while time.perf_counter() < deadline:
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text("INSERT INTO reservations (teacher_id, status, content, created_at) VALUES (:t, 'pending', :c, :ts)"),
+                    {"t": random.randrange(50), "c": "x" * 200, "ts": time.time()}
+                )
+            count += 1
+        except Exception:
+            errors += 1
+    with lock:
+        stats["writes"] += count
+        stats["write_errors"] += errors
+
+
+def reader(engine, deadline, stats, lock):
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(
+                    text("SELECT * FROM reservations WHERE teacher_id = :t ORDER BY created_at DESC LIMIT 50"),
+                    {"t": random.randrange(50)}
+                ).fetchall()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+    with lock:
+        stats["read_latencies"].extend(latencies)
+        stats["read_errors"] += errors
+
+
+def run(name, pragmas, args):
+    directory = tempfile.mkdtemp(prefix="sqlite_bench_")
+    path = os.path.join(directory, "bench.db")
+    engine = create_database_engine(
+        f"sqlite:///{path}",
+        pragmas=pragmas,
+        pool_size=args.writers + args.readers
+    )
+    prepare(engine)
+
+    stats = {"writes": 0, "write_errors": 0, "read_latencies": [], "read_errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=writer, args=(engine, deadline, stats, lock)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(engine, deadline, stats, lock)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies = stats["read_latencies"]
+    print(
+        f"{name:<8} 写入 {stats['writes'] / args.duration:8.1f}/s (失败 {stats['write_errors']})  "
+        f"读取 {len(latencies) / args.duration:8.1f}/s (失败 {stats['read_errors']})  "
+        f"读 p50 {percentile(latencies, 50) * 1000:7.2f}ms  p99 {percentile(latencies, 99) * 1000:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 读写并发测试")
+    parser.add_argument("--writers", type=int, default=4, help="写线程数")
+    parser.add_argument("--readers", type=int, default=8, help="读线程数")
+    parser.add_argument("--duration", type=float, default=10, help="每组测试时长（秒）")
+    args = parser.parse_args()
+
+    run("default", DEFAULT_PRAGMAS, args)
+    run("tuned", sqlite_pragmas(), args)
+
+
+if __name__ == "__main__":
+    main()
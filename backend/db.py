@@ -1,9 +1,442 @@
+import csv
+import queue
+import re
 import sqlite3
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
 import sys
 
+from utils.search import SEARCH_TABLE, build_match_query
+
+# 表格每页显示的行数，只有当前页的数据会读取并插入Treeview
+PAGE_SIZE = 200
+
+# 导出时每批从游标读取并写入文件的行数
+EXPORT_CHUNK_SIZE = 1000
+
+# 主线程检查后台查询结果的间隔（毫秒）
+POLL_INTERVAL_MS = 50
+
+# 后台查询每执行多少条SQLite虚拟机指令检查一次取消标志
+PROGRESS_HANDLER_STEPS = 1000
+
+class QueryJob:
+    """提交给后台线程的查询任务；回调均在主线程中调用"""
+    
+    def __init__(self, task, on_result=None, on_error=None, on_progress=None, on_cancel=None):
+        self.task = task
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.cancelled = threading.Event()
+        self.started_at = None
+        self.elapsed = None
+        self.messages = None
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def emit(self, data):
+        # 在后台线程中调用，把中间结果（如导出进度）交给主线程
+        self.messages.put((self, "progress", data))
+
+class QueryWorker:
+    """在后台线程中使用独立的数据库连接依次执行查询任务，结果通过队列交回主线程
+    
+    主线程用after()定时取出结果并调用任务的回调，界面不会因慢查询而卡住；
+    取消任务时由SQLite进度回调中断正在执行的语句。
+    """
+    
+    def __init__(self, root, db_path, on_busy=None):
+        self.root = root
+        self.db_path = db_path
+        self.on_busy = on_busy
+        self.jobs = queue.Queue()
+        self.messages = queue.Queue()
+        self.current = None
+        self.pending = 0
+        self.closed = False
+        
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+    
+    def submit(self, task, **callbacks):
+        """提交任务并取消尚未完成的上一个任务；task(connection, job)在后台线程中执行，返回值交给on_result"""
+        self.cancel()
+        job = QueryJob(task, **callbacks)
+        job.messages = self.messages
+        self.current = job
+        self.pending += 1
+        if self.pending == 1 and self.on_busy:
+            self.on_busy(True)
+        self.jobs.put(job)
+        return job
+    
+    def cancel(self):
+        if self.current:
+            self.current.cancel()
+    
+    def close(self):
+        self.cancel()
+        self.closed = True
+        self.jobs.put(None)
+    
+    def _run(self):
+        # 连接在后台线程中创建，只在该线程中使用
+        connection = sqlite3.connect(self.db_path)
+        connection.row_factory = sqlite3.Row
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled.is_set():
+                self.messages.put((job, "cancelled", None))
+                continue
+            
+            # 进度回调返回非零值时SQLite中断当前语句并抛出OperationalError
+            connection.set_progress_handler(lambda job=job: 1 if job.cancelled.is_set() else 0, PROGRESS_HANDLER_STEPS)
+            job.started_at = time.perf_counter()
+            try:
+                result = job.task(connection, job)
+                job.elapsed = time.perf_counter() - job.started_at
+                self.messages.put((job, "result", result))
+            except Exception as e:
+                job.elapsed = time.perf_counter() - job.started_at
+                if connection.in_transaction:
+                    connection.rollback()
+                self.messages.put((job, "cancelled" if job.cancelled.is_set() else "error", e))
+            finally:
+                connection.set_progress_handler(None, 0)
+        connection.close()
+    
+    def _poll(self):
+        if self.closed:
+            return
+        try:
+            while True:
+                try:
+                    job, kind, data = self.messages.get_nowait()
+                except queue.Empty:
+                    break
+                self._dispatch(job, kind, data)
+        finally:
+            # 回调出错时也要继续轮询，否则之后的任务结果都无法交回主线程
+            if not self.closed:
+                self.root.after(POLL_INTERVAL_MS, self._poll)
+    
+    def _dispatch(self, job, kind, data):
+        if kind == "progress":
+            # 已取消任务的进度不再显示
+            if job.on_progress and not job.cancelled.is_set():
+                self._call(job.on_progress, data)
+            return
+        
+        self.pending -= 1
+        if self.current is job:
+            self.current = None
+        if kind == "result" and not job.cancelled.is_set():
+            if job.on_result:
+                self._call(job.on_result, data)
+        elif kind == "error":
+            if job.on_error:
+                self._call(job.on_error, data)
+        elif job.on_cancel:
+            self._call(job.on_cancel)
+        if self.pending == 0 and self.on_busy:
+            self._call(self.on_busy, False)
+    
+    def _call(self, callback, *args):
+        # 单个回调出错（如结果窗口已关闭）只报告错误，不影响其他任务
+        try:
+            callback(*args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+def query_page(connection, sql, params, page, page_size, count=False, explain=False):
+    """在后台线程中读取一页查询结果，多读取一行用于判断是否还有下一页
+    
+    count为True时同时统计总行数；explain为True时同时返回查询计划。返回 (总行数, 列名, 行, 查询计划, 耗时秒数)
+    """
+    plan = None
+    if explain:
+        plan = "; ".join(row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    
+    # 原查询后换行再接括号，查询以 -- 注释结尾时注释不会吞掉分页子句
+    start = time.perf_counter()
+    total = None
+    if count:
+        total = connection.execute(f"SELECT count(*) FROM ({sql}\n)", params).fetchone()[0]
+    cursor = connection.execute(
+        f"SELECT * FROM ({sql}\n) LIMIT :page_limit OFFSET :page_offset",
+        {**params, "page_limit": page_size + 1, "page_offset": page * page_size}
+    )
+    # 确保将sqlite3.Row对象转换为元组，以便正确显示值
+    rows = [tuple(row) for row in cursor.fetchall()]
+    return total, [description[0] for description in cursor.description], rows, plan, time.perf_counter() - start
+
+# 搜索匹配方式：(显示名称, 方式)
+SEARCH_MODES = [("包含", "contains"), ("前缀", "prefix"), ("精确", "exact"), ("全文", "fts")]
+
+# 列选择框中表示在所有列中搜索的选项
+ALL_COLUMNS = "全部列"
+
+# 后端维护的独立FTS5检索表及其对应的数据表：rowid 与数据表 id 一致，中文按二元组切分后存入
+TOKENIZED_FTS_TABLES = {SEARCH_TABLE: "schools"}
+
+def column_affinity(declared_type):
+    """按SQLite的规则由列声明类型得到类型亲和性"""
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return "INTEGER"
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if not declared_type or "BLOB" in declared_type:
+        return "BLOB"
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+def table_columns(connection, table_name):
+    """返回表的列信息：列名、是否为数值列、是否是某个索引的第一列（可用于等值和范围查找）"""
+    columns_info = connection.execute(f"PRAGMA table_info({table_name});").fetchall()
+    indexed = set()
+    for index in connection.execute(f"PRAGMA index_list({table_name});").fetchall():
+        first = connection.execute(f"PRAGMA index_info({index[1]});").fetchone()
+        if first is not None and first[2] is not None:
+            indexed.add(first[2])
+    
+    columns = []
+    for col in columns_info:
+        affinity = column_affinity(col[2])
+        # INTEGER PRIMARY KEY 是rowid的别名，本身有序
+        if col[5] and affinity == "INTEGER" and col[2].upper() == "INTEGER":
+            indexed.add(col[1])
+        columns.append({"name": col[1], "numeric": affinity in ("INTEGER", "REAL"), "indexed": col[1] in indexed})
+    return columns
+
+def fts_source(connection, table_name):
+    """查找可用于全文搜索的FTS5表：表本身是FTS5表，FTS5表以content=选项引用该表，或是该表的后端检索表
+    
+    返回 (FTS表名, FTS列名列表, 是否需按rowid关联回该表, 是否按二元组切分)，没有时返回None
+    """
+    for name, sql in connection.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"):
+        match = re.search(r"USING\s+fts5\s*\((.*)\)\s*$", sql, re.IGNORECASE | re.DOTALL)
+        if not match:
+            continue
+        arguments = [argument.strip() for argument in match.group(1).split(",")]
+        options = dict(
+            (key.strip().lower(), value.strip().strip("'\"")) for key, _, value in
+            (argument.partition("=") for argument in arguments if "=" in argument)
+        )
+        columns = [argument.split()[0].strip("'\"`[]") for argument in arguments if "=" not in argument and argument]
+        tokenized = name in TOKENIZED_FTS_TABLES
+        if name == table_name:
+            return name, columns, False, tokenized
+        if options.get("content") == table_name or TOKENIZED_FTS_TABLES.get(name) == table_name:
+            return name, columns, True, tokenized
+    return None
+
+def prefix_upper_bound(prefix):
+    # 前缀范围的上界：最后一个字符加一，如 "abc" -> "abd"
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def build_search_query(table_name, columns, column, mode, text, fts=None):
+    """构建搜索SQL，返回 (sql, 参数)；搜索方式不适用时抛出ValueError
+    
+    前缀和精确匹配使用范围和等值条件，列上有索引时可以走索引；包含匹配（LIKE '%x%'）只能全表扫描；
+    数值列只参与精确匹配，不再按文本匹配。
+    """
+    if column == ALL_COLUMNS:
+        targets = columns
+    else:
+        targets = [col for col in columns if col["name"] == column]
+    
+    if mode == "fts":
+        if fts is None:
+            raise ValueError(f"表 {table_name} 没有全文索引（FTS5），请选择其他匹配方式")
+        fts_table, fts_columns, external, tokenized = fts
+        if column != ALL_COLUMNS and column not in fts_columns:
+            raise ValueError(f"列 {column} 不在全文索引中，可搜索的列：{', '.join(fts_columns)}")
+        if tokenized:
+            # 检索表中的中文已切分为二元组，按后端学校搜索相同的方式构建查询
+            query = build_match_query(text, None if column == ALL_COLUMNS else [column])
+            if query is None:
+                raise ValueError("搜索内容中没有可检索的词")
+        elif column != ALL_COLUMNS:
+            query = f"{{{column}}} : ({text})"
+        else:
+            query = text
+        if external:
+            return f"SELECT * FROM {table_name} WHERE rowid IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :search)", {"search": query}
+        return f"SELECT * FROM {table_name} WHERE {table_name} MATCH :search", {"search": query}
+    
+    is_number = re.fullmatch(r"[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?", text) is not None
+    conditions = []
+    params = {}
+    for i, col in enumerate(targets):
+        name = col["name"]
+        if col["numeric"]:
+            # 数值列只支持精确匹配，输入不是数字时跳过
+            if mode == "exact" and is_number:
+                conditions.append(f"{name} = :search{i}")
+                params[f"search{i}"] = float(text) if any(c in text for c in ".eE") else int(text)
+            continue
+        if mode == "exact":
+            conditions.append(f"{name} = :search{i}")
+            params[f"search{i}"] = text
+        elif mode == "prefix":
+            # 使用范围条件代替 LIKE 'x%'，可以使用列上的索引（区分大小写）
+            conditions.append(f"({name} >= :search{i} AND {name} < :search{i}_end)")
+            params[f"search{i}"] = text
+            params[f"search{i}_end"] = prefix_upper_bound(text)
+        else:
+            conditions.append(f"{name} LIKE :search{i}")
+            params[f"search{i}"] = f"%{text}%"
+    
+    if not conditions:
+        if column != ALL_COLUMNS and targets and targets[0]["numeric"]:
+            raise ValueError(f"列 {column} 为数值列，只支持输入数字进行精确匹配")
+        raise ValueError("没有可按该方式搜索的列")
+    return f"SELECT * FROM {table_name} WHERE " + " OR ".join(conditions), params
+
+class PagedTreeview(ttk.Frame):
+    """分页显示查询结果的表格，只读取和插入当前页的行，翻页时重新查询"""
+    
+    def __init__(self, parent, page_size=PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.worker = None
+        self.sql = None
+        self.params = {}
+        self.count = False
+        self.explain = False
+        self.total = None
+        self.plan = None
+        self.elapsed = None
+        self.on_loaded = None
+        self.on_error = None
+        self.error_title = "加载数据失败"
+        self.page = 0
+        self.has_next = False
+        
+        table_frame = ttk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 创建Treeview和滚动条
+        self.tree = ttk.Treeview(table_frame)
+        v_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        h_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        
+        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        
+        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # 翻页按钮
+        nav_frame = ttk.Frame(self)
+        nav_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        self.first_button = ttk.Button(nav_frame, text="首页", command=lambda: self.go_to_page(0))
+        self.first_button.pack(side=tk.LEFT, padx=2)
+        self.prev_button = ttk.Button(nav_frame, text="上一页", command=lambda: self.go_to_page(self.page - 1))
+        self.prev_button.pack(side=tk.LEFT, padx=2)
+        self.next_button = ttk.Button(nav_frame, text="下一页", command=lambda: self.go_to_page(self.page + 1))
+        self.next_button.pack(side=tk.LEFT, padx=2)
+        self.page_label = ttk.Label(nav_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+        self.update_navigation()
+    
+    def set_columns(self, columns):
+        self.tree['columns'] = columns
+        self.tree['show'] = 'headings'
+        
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=100, anchor=tk.W)
+    
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+    
+    def set_query(self, worker, sql, params=None, count=False, explain=False, on_loaded=None, on_error=None, error_title="加载数据失败"):
+        """设置数据来源并在后台加载第一页；count为True时同时统计总行数，否则只根据下一页是否有数据判断能否翻页
+        
+        第一页加载完成后调用on_loaded(self)，可通过self.total读取总行数，explain为True时通过self.plan读取查询计划，
+        self.elapsed为查询耗时；
+        指定on_error时，第一页加载失败或被取消调用on_error(error)（取消时error为None），否则弹窗提示错误
+        """
+        self.worker = worker
+        self.sql = sql.strip().rstrip(";")
+        self.params = params or {}
+        self.count = count
+        self.explain = explain
+        self.total = None
+        self.plan = None
+        self.on_loaded = on_loaded
+        self.on_error = on_error
+        self.error_title = error_title
+        self.load_page(0)
+    
+    def load_page(self, page):
+        sql, params, page_size = self.sql, self.params, self.page_size
+        count = self.count and self.total is None
+        explain = self.explain and page == 0
+        
+        def show(result):
+            total, columns, rows, plan, elapsed = result
+            if count:
+                self.total = total
+            if explain:
+                self.plan = plan
+            self.elapsed = elapsed
+            self.set_columns(columns)
+            self.clear()
+            for row in rows[:page_size]:
+                self.tree.insert('', tk.END, values=row)
+            
+            self.page = page
+            self.has_next = len(rows) > page_size
+            self.update_navigation()
+            if page == 0 and self.on_loaded:
+                self.on_loaded(self)
+        
+        def failed(error):
+            if page == 0 and self.on_error:
+                self.on_error(error)
+            elif error is not None:
+                messagebox.showerror("错误", f"{self.error_title}: {str(error)}")
+        
+        self.worker.submit(
+            lambda connection, job: query_page(connection, sql, params, page, page_size, count, explain),
+            on_result=show,
+            on_error=failed,
+            on_cancel=lambda: failed(None)
+        )
+    
+    def go_to_page(self, page):
+        if self.sql is None or page < 0:
+            return
+        self.load_page(page)
+    
+    def update_navigation(self):
+        loaded = self.sql is not None
+        self.first_button.config(state=tk.NORMAL if loaded and self.page > 0 else tk.DISABLED)
+        self.prev_button.config(state=tk.NORMAL if loaded and self.page > 0 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if loaded and self.has_next else tk.DISABLED)
+        
+        if not loaded:
+            self.page_label.config(text="")
+        elif self.total is not None:
+            pages = max(1, (self.total + self.page_size - 1) // self.page_size)
+            self.page_label.config(text=f"第 {self.page + 1} / {pages} 页，每页 {self.page_size} 条")
+        else:
+            self.page_label.config(text=f"第 {self.page + 1} 页，每页 {self.page_size} 条")
+
 class SQLiteVisualizer:
     def __init__(self, db_path):
         self.db_path = db_path
@@ -61,8 +494,22 @@ class SQLiteVisualizer:
         search_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(search_frame, text="搜索:").pack(side=tk.LEFT, padx=2)
+        
+        # 搜索列（标注“索引”的列可使用索引查找）和匹配方式
+        self.search_column = ttk.Combobox(search_frame, state="readonly", width=18, values=[ALL_COLUMNS])
+        self.search_column.set(ALL_COLUMNS)
+        self.search_column.pack(side=tk.LEFT, padx=2)
+        self.search_column_names = {ALL_COLUMNS: ALL_COLUMNS}
+        self.search_columns = []
+        self.search_fts = None
+        
+        self.search_mode = ttk.Combobox(search_frame, state="readonly", width=6, values=[label for label, _ in SEARCH_MODES])
+        self.search_mode.set(SEARCH_MODES[0][0])
+        self.search_mode.pack(side=tk.LEFT, padx=2)
+        
         self.search_entry = ttk.Entry(search_frame, width=30)
         self.search_entry.pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
+        self.search_entry.bind('<Return>', lambda event: self.search_data())
         
         self.search_button = ttk.Button(search_frame, text="查找", command=self.search_data)
         self.search_button.pack(side=tk.LEFT, padx=2)
@@ -70,6 +517,10 @@ class SQLiteVisualizer:
         self.clear_search_button = ttk.Button(search_frame, text="清除", command=self.clear_search)
         self.clear_search_button.pack(side=tk.LEFT, padx=2)
         
+        # 搜索结果数、耗时和查询计划
+        self.search_info_label = ttk.Label(right_frame, text="", foreground="gray", wraplength=800)
+        self.search_info_label.pack(fill=tk.X)
+        
         # 查询框架
         query_frame = ttk.Frame(right_frame)
         query_frame.pack(fill=tk.X, pady=(0, 10))
@@ -81,23 +532,26 @@ class SQLiteVisualizer:
         
         ttk.Button(query_frame, text="执行", command=self.execute_query).pack(side=tk.RIGHT)
         
-        # 数据表格框架
-        table_frame = ttk.Frame(right_frame)
-        table_frame.pack(fill=tk.BOTH, expand=True)
+        # 查询状态栏，后台查询执行时可取消
+        status_frame = ttk.Frame(right_frame)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
         
-        # 创建Treeview和滚动条
-        self.tree = ttk.Treeview(table_frame)
-        v_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        h_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.status_label = ttk.Label(status_frame, text="就绪")
+        self.status_label.pack(side=tk.LEFT, padx=2)
+        self.cancel_query_button = ttk.Button(status_frame, text="取消查询", state=tk.DISABLED, command=self.cancel_query)
+        self.cancel_query_button.pack(side=tk.RIGHT, padx=2)
         
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # 数据表格框架，分页显示
+        self.table_view = PagedTreeview(right_frame)
+        self.table_view.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.table_view.tree
         
         # 连接数据库
         self.connect_db()
+        # 查询在后台线程中执行，使用独立的数据库连接；导出使用单独的后台线程，
+        # 不会被翻页、搜索等新查询取消，也不会让这些查询排在导出之后等待
+        self.worker = QueryWorker(self.root, self.db_path, on_busy=self.on_query_busy)
+        self.export_worker = QueryWorker(self.root, self.db_path)
         # 加载表列表
         self.load_tables()
         
@@ -144,48 +598,37 @@ class SQLiteVisualizer:
         if selection:
             table_name = self.table_listbox.get(selection[0])
             self.current_table = table_name
+            self.update_search_columns(table_name)
             self.load_table_data(table_name)
     
     def load_table_data(self, table_name):
-        try:
-            # 清空现有数据
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # 获取表结构
-            cursor = self.connection.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name});")
-            columns_info = cursor.fetchall()
-            
-            # 设置列标题
-            columns = [col[1] for col in columns_info]
-            self.tree['columns'] = columns
-            self.tree['show'] = 'headings'
-            
-            for col in columns:
-                self.tree.heading(col, text=col)
-                self.tree.column(col, width=100, anchor=tk.W)
-            
-            # 获取表数据 - 移除LIMIT限制，显示所有数据
-            cursor.execute(f"SELECT * FROM {table_name};")
-            rows = cursor.fetchall()
-            
-            # 插入数据
-            for row in rows:
-                # 确保将sqlite3.Row对象转换为元组，以便正确显示值
-                if isinstance(row, sqlite3.Row):
-                    # 对于Row对象，提取其所有值
-                    row_values = tuple(row)
-                else:
-                    row_values = row
-                self.tree.insert('', tk.END, values=row_values)
-                
-            # 更新标签，显示记录数量
-            self.table_label.config(text=f"表: {table_name} (共{len(rows)}条记录)")
-            self.current_table = table_name
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"加载表数据失败: {str(e)}")
+        self.current_table = table_name
+        loading_text = f"表: {table_name} (加载中...)"
+        self.table_label.config(text=loading_text)
+        
+        # 更新标签，显示记录数量
+        def loaded(view):
+            self.table_label.config(text=f"表: {table_name} (共{view.total}条记录)")
+        
+        # 加载被取消或出错时恢复标签（标签已被之后的查询更新时保持不变），出错时同时提示错误
+        def failed(error):
+            if self.table_label.cget("text") == loading_text:
+                self.table_label.config(text=f"表: {table_name}")
+            if error is not None:
+                messagebox.showerror("错误", f"加载表数据失败: {str(error)}")
+        
+        # 在后台统计记录数并读取第一页数据，翻页时再读取其他页
+        self.table_view.set_query(
+            self.worker, f"SELECT * FROM {table_name}",
+            count=True, on_loaded=loaded, on_error=failed
+        )
+    
+    def on_query_busy(self, busy):
+        self.status_label.config(text="正在查询..." if busy else "就绪")
+        self.cancel_query_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+    
+    def cancel_query(self):
+        self.worker.cancel()
     
     def refresh_data(self):
         # 刷新当前表的数据
@@ -194,6 +637,23 @@ class SQLiteVisualizer:
         else:
             messagebox.showinfo("信息", "请先选择一个表")
     
+    def update_search_columns(self, table_name):
+        # 切换表时更新可搜索的列，标注可使用索引查找的列
+        try:
+            self.search_columns = table_columns(self.connection, table_name)
+            self.search_fts = fts_source(self.connection, table_name)
+        except Exception as e:
+            messagebox.showerror("错误", f"读取表结构失败: {str(e)}")
+            return
+        
+        self.search_column_names = {ALL_COLUMNS: ALL_COLUMNS}
+        for col in self.search_columns:
+            label = f"{col['name']} (索引)" if col["indexed"] else col["name"]
+            self.search_column_names[label] = col["name"]
+        self.search_column.config(values=list(self.search_column_names))
+        self.search_column.set(ALL_COLUMNS)
+        self.search_info_label.config(text="")
+    
     def search_data(self):
         # 搜索数据
         if not hasattr(self, 'current_table') or not self.current_table:
@@ -205,48 +665,37 @@ class SQLiteVisualizer:
             messagebox.showinfo("信息", "请输入搜索内容")
             return
         
+        column = self.search_column_names.get(self.search_column.get(), ALL_COLUMNS)
+        mode = dict(SEARCH_MODES)[self.search_mode.get()]
         try:
-            # 获取当前表的所有列
-            columns = self.tree['columns']
-            if not columns:
-                messagebox.showinfo("信息", "没有可搜索的列")
-                return
-            
-            # 构建搜索条件（在所有列中搜索）
-            search_conditions = []
-            params = {}
-            
-            for i, col in enumerate(columns):
-                search_conditions.append(f"{col} LIKE :search{i}")
-                params[f"search{i}"] = f"%{search_text}%"
-            
-            where_clause = " OR ".join(search_conditions)
-            sql = f"SELECT * FROM {self.current_table} WHERE {where_clause}"
-            
-            cursor = self.connection.cursor()
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-            
-            # 清空当前表格并显示搜索结果
-            self.tree.delete(*self.tree.get_children())
-            
-            # 确保将sqlite3.Row对象转换为元组，以便正确显示值
-            for row in rows:
-                if isinstance(row, sqlite3.Row):
-                    # 对于Row对象，提取其所有值
-                    row_values = tuple(row)
-                else:
-                    row_values = row
-                self.tree.insert('', tk.END, values=row_values)
-                
-            messagebox.showinfo("搜索结果", f"找到 {len(rows)} 条匹配记录")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"搜索失败: {str(e)}")
+            sql, params = build_search_query(self.current_table, self.search_columns, column, mode, search_text, self.search_fts)
+        except ValueError as e:
+            messagebox.showinfo("信息", str(e))
+            return
+        
+        # 在表格上方显示匹配数、耗时和查询计划，SCAN表示全表扫描，SEARCH ... USING INDEX表示使用了索引
+        def loaded(view):
+            self.search_info_label.config(
+                text=f"找到 {view.total} 条匹配记录，用时 {view.elapsed * 1000:.1f}ms | 查询计划: {view.plan}"
+            )
+        
+        def failed(error):
+            if self.search_info_label.cget("text") == "正在搜索...":
+                self.search_info_label.config(text="")
+            if error is not None:
+                messagebox.showerror("错误", f"搜索失败: {str(error)}")
+        
+        # 在后台统计匹配数并分页显示搜索结果
+        self.search_info_label.config(text="正在搜索...")
+        self.table_view.set_query(
+            self.worker, sql, params,
+            count=True, explain=True, on_loaded=loaded, on_error=failed, error_title="搜索失败"
+        )
     
     def clear_search(self):
         # 清除搜索内容并重新加载全部数据
         self.search_entry.delete(0, tk.END)
+        self.search_info_label.config(text="")
         self.refresh_data()
     
     def execute_query(self, event=None):
@@ -254,40 +703,26 @@ class SQLiteVisualizer:
         if not query:
             return
         
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(query)
-            
-            if query.lower().startswith('select'):
-                # 清空现有数据
-                for item in self.tree.get_children():
-                    self.tree.delete(item)
-                
-                # 获取列名
-                columns = [description[0] for description in cursor.description]
-                self.tree['columns'] = columns
-                self.tree['show'] = 'headings'
-                
-                for col in columns:
-                    self.tree.heading(col, text=col)
-                    self.tree.column(col, width=100, anchor=tk.W)
-                
-                # 插入数据
-                rows = cursor.fetchall()
-                for row in rows:
-                    # 确保将sqlite3.Row对象转换为元组，以便正确显示值
-                    if isinstance(row, sqlite3.Row):
-                        row_values = tuple(row)
-                    else:
-                        row_values = row
-                    self.tree.insert('', tk.END, values=row_values)
-            else:
-                # 对于非SELECT语句，提交更改
-                self.connection.commit()
-                messagebox.showinfo("成功", f"查询执行成功，影响了 {cursor.rowcount} 行")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"查询执行失败: {str(e)}")
+        if query.lower().startswith('select'):
+            # 分页显示查询结果，不统计总行数
+            self.table_view.set_query(self.worker, query, error_title="查询执行失败")
+        else:
+            # 对于非SELECT语句，提交更改
+            self.worker.submit(
+                self.execute_statement(query),
+                on_result=lambda rowcount: messagebox.showinfo("成功", f"查询执行成功，影响了 {rowcount} 行"),
+                on_error=lambda e: messagebox.showerror("错误", f"查询执行失败: {str(e)}"),
+                on_cancel=lambda: messagebox.showinfo("信息", "查询已取消，未提交任何更改")
+            )
+    
+    @staticmethod
+    def execute_statement(query):
+        # 返回在后台线程中执行非SELECT语句并提交的任务，结果为影响的行数
+        def task(connection, job):
+            cursor = connection.execute(query)
+            connection.commit()
+            return cursor.rowcount
+        return task
     
     def execute_sql_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -316,62 +751,45 @@ class SQLiteVisualizer:
         
         ttk.Button(button_frame, text="执行", 
                   command=lambda: self.execute_sql_from_dialog(text_widget, dialog)).pack(side=tk.LEFT)
-        ttk.Button(button_frame, text="取消", command=dialog.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        # 对话框为模态窗口，取消时同时中断正在执行的查询
+        ttk.Button(button_frame, text="取消", command=lambda: (self.worker.cancel(), dialog.destroy())).pack(side=tk.RIGHT, padx=(5, 0))
     
     def execute_sql_from_dialog(self, text_widget, dialog):
         query = text_widget.get("1.0", tk.END).strip()
         if not query:
             return
         
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(query)
+        if query.lower().startswith('select'):
+            # 第一页加载完成后再显示结果窗口，查询出错时不显示
+            result_window = tk.Toplevel(self.root)
+            result_window.withdraw()
+            result_window.title("查询结果")
+            result_window.geometry("800x600")
+            result_view = PagedTreeview(result_window)
+            result_view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
             
-            if query.lower().startswith('select'):
-                # 在新窗口中显示结果
-                result_window = tk.Toplevel(self.root)
-                result_window.title("查询结果")
-                result_window.geometry("800x600")
-                
-                result_frame = ttk.Frame(result_window)
-                result_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-                
-                result_tree = ttk.Treeview(result_frame)
-                v_scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=result_tree.yview)
-                h_scrollbar = ttk.Scrollbar(result_frame, orient=tk.HORIZONTAL, command=result_tree.xview)
-                
-                result_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
-                
-                v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-                h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-                result_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-                
-                # 设置列标题
-                columns = [description[0] for description in cursor.description]
-                result_tree['columns'] = columns
-                result_tree['show'] = 'headings'
-                
-                for col in columns:
-                    result_tree.heading(col, text=col)
-                    result_tree.column(col, width=100, anchor=tk.W)
-                
-                # 插入数据
-                rows = cursor.fetchall()
-                for row in rows:
-                    # 确保将sqlite3.Row对象转换为元组，以便正确显示值
-                    if isinstance(row, sqlite3.Row):
-                        row_values = tuple(row)
-                    else:
-                        row_values = row
-                    result_tree.insert('', tk.END, values=row_values)
-            else:
-                # 对于非SELECT语句，提交更改
-                self.connection.commit()
-                messagebox.showinfo("成功", f"查询执行成功，影响了 {cursor.rowcount} 行")
+            def loaded(view):
+                result_window.deiconify()
+                dialog.destroy()
             
-            dialog.destroy()
-        except Exception as e:
-            messagebox.showerror("错误", f"查询执行失败: {str(e)}")
+            def failed(error):
+                result_window.destroy()
+                if error is not None:
+                    messagebox.showerror("错误", f"查询执行失败: {str(error)}")
+            
+            result_view.set_query(self.worker, query, on_loaded=loaded, on_error=failed, error_title="查询执行失败")
+        else:
+            # 对于非SELECT语句，提交更改
+            def executed(rowcount):
+                messagebox.showinfo("成功", f"查询执行成功，影响了 {rowcount} 行")
+                dialog.destroy()
+            
+            self.worker.submit(
+                self.execute_statement(query),
+                on_result=executed,
+                on_error=lambda e: messagebox.showerror("错误", f"查询执行失败: {str(e)}"),
+                on_cancel=lambda: messagebox.showinfo("信息", "查询已取消，未提交任何更改")
+            )
     
     def edit_record_dialog(self):
         # 检查是否选择了表
@@ -749,24 +1167,68 @@ class SQLiteVisualizer:
         if not file_path:
             return
         
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(f"SELECT * FROM {table_name};")
-            rows = cursor.fetchall()
-            
-            # 获取列名
-            columns = [description[0] for description in cursor.description]
-            
-            # 写入CSV文件
-            with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                import csv
-                writer = csv.writer(f)
-                writer.writerow(columns)  # 写入列名
-                writer.writerows(rows)    # 写入数据
-            
-            messagebox.showinfo("成功", f"数据已导出到 {file_path}")
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {str(e)}")
+        # 进度对话框
+        dialog = tk.Toplevel(self.root)
+        dialog.title("导出数据")
+        dialog.geometry("400x130")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        progress_label = ttk.Label(frame, text=f"正在导出 {table_name}...")
+        progress_label.pack(anchor=tk.W)
+        progress_bar = ttk.Progressbar(frame, mode="determinate")
+        progress_bar.pack(fill=tk.X, pady=10)
+        
+        # 在后台线程中分批读取并写入文件，每批完成后报告进度；取消或出错时删除未写完的文件
+        def task(connection, job):
+            total = connection.execute(f"SELECT count(*) FROM {table_name};").fetchone()[0]
+            cursor = connection.execute(f"SELECT * FROM {table_name};")
+            written = 0
+            completed = False
+            try:
+                with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow([description[0] for description in cursor.description])  # 写入列名
+                    job.emit((written, total))
+                    while not job.cancelled.is_set():
+                        rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                        if not rows:
+                            break
+                        writer.writerows(rows)
+                        written += len(rows)
+                        job.emit((written, total))
+                completed = not job.cancelled.is_set()
+            finally:
+                if not completed and os.path.exists(file_path):
+                    os.remove(file_path)
+            if not completed:
+                raise sqlite3.OperationalError("interrupted")
+            return written
+        
+        def progress(data):
+            written, total = data
+            progress_bar.config(maximum=max(total, 1), value=written)
+            progress_label.config(text=f"正在导出 {table_name}：{written} / {total}")
+        
+        def finished(written):
+            dialog.destroy()
+            messagebox.showinfo("成功", f"已导出 {written} 条记录到 {file_path}")
+        
+        def failed(error):
+            dialog.destroy()
+            messagebox.showerror("错误", f"导出失败: {str(error)}")
+        
+        def cancelled():
+            dialog.destroy()
+            messagebox.showinfo("信息", "导出已取消")
+        
+        job = self.export_worker.submit(task, on_result=finished, on_error=failed, on_progress=progress, on_cancel=cancelled)
+        
+        ttk.Button(frame, text="取消", command=job.cancel).pack(side=tk.RIGHT)
+        dialog.protocol("WM_DELETE_WINDOW", job.cancel)
     
     def open_database(self):
         file_path = filedialog.askopenfilename(
@@ -775,9 +1237,11 @@ class SQLiteVisualizer:
         )
         
         if file_path:
-            # 关闭当前连接
+            # 关闭当前连接并停止后台查询线程
             if self.connection:
                 self.connection.close()
+            self.worker.close()
+            self.export_worker.close()
             
             # 创建新的可视化器实例
             self.__init__(file_path)
@@ -7,7 +7,7 @@ from contextlib import asynccontextmanager
 import logging
 
 from utils.config import settings
-from utils.database import create_tables
+from utils.database import async_engine, init_database
 from api import auth, student, teacher, schools
 
 # 配置日志
@@ -17,12 +17,12 @@ logger = logging.getLogger(__name__)
 # 应用启动和关闭事件
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动时创建数据库表
-    create_tables()
-    print("数据库表创建完成")
+    # 启动时执行未完成的数据库迁移，数据库已是最新版本时跳过
+    version = init_database()
+    print(f"数据库初始化完成，当前版本: {version}")
     yield
     # 关闭时的清理工作
-    pass
+    await async_engine.dispose()
 
 # 创建FastAPI应用实例
 app = FastAPI(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum, CheckConstraint, Index
 import enum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -22,6 +22,11 @@ class ReservationStatus(str, enum.Enum):
     ACCEPTED = "accepted"
     COMPLETED = "completed"
 
+class ApplicationStatus(str, enum.Enum):
+    PENDING = "pending"
+    ADMITTED = "admitted"
+    REJECTED = "rejected"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -45,7 +50,7 @@ class StudentProfile(Base):
     __tablename__ = "student_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String(50), nullable=False)
     gender = Column(String(10))
     age = Column(Integer)
@@ -74,7 +79,7 @@ class TeacherProfile(Base):
     __tablename__ = "teacher_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String(50), nullable=False)
     email = Column(String(100))
     phone = Column(String(20))
@@ -112,7 +117,7 @@ class SchoolMajor(Base):
     __tablename__ = "school_majors"
     
     id = Column(Integer, primary_key=True, index=True)
-    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False, index=True)
     major_name = Column(String(100), nullable=False)
     major_rank = Column(Integer)
     
@@ -141,10 +146,12 @@ class TrainingReservation(Base):
     feedback = Column(Text)
     homework = Column(Text)
     
-    # 添加小时数约束
+    # 添加小时数约束和学生、教师预约列表查询索引
     __table_args__ = (
         CheckConstraint('total_hours > 0', name='check_valid_total_hours'),
         CheckConstraint('attended_hours >= 0', name='check_valid_attended_hours'),
+        Index('ix_training_reservations_student_created', 'student_id', 'created_at'),
+        Index('ix_training_reservations_teacher_status_created', 'teacher_id', 'status', 'created_at'),
     )
     created_at = Column(DateTime, default=get_local_time)
     updated_at = Column(DateTime, default=get_local_time, onupdate=get_local_time)
@@ -168,10 +175,12 @@ class DocumentReservation(Base):
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING)
     progress = Column(Integer, default=0)  # 0-100%
     
-    # 添加文档数量和进度约束
+    # 添加文档数量、进度约束和学生、教师预约列表查询索引
     __table_args__ = (
         CheckConstraint('document_count > 0', name='check_valid_document_count'),
         CheckConstraint('progress >= 0 AND progress <= 100', name='check_valid_progress'),
+        Index('ix_document_reservations_student_created', 'student_id', 'created_at'),
+        Index('ix_document_reservations_teacher_status_created', 'teacher_id', 'status', 'created_at'),
     )
     original_content = Column(Text)
     revised_content = Column(Text)
@@ -194,26 +203,30 @@ class SuccessCase(Base):
     created_at = Column(DateTime, default=get_local_time)
     updated_at = Column(DateTime, default=get_local_time, onupdate=get_local_time)
 
-# 创建数据库会话
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-# 导入配置
-from utils.config import settings
-
-# 创建数据库引擎，启用SQLite外键约束
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
-
-# 启用外键约束
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
-import sqlite3
+# 留学申请记录表，保存申请时的成绩和录取结果，用于训练录取预测模型
+class Application(Base):
+    __tablename__ = "applications"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False, index=True)
+    major_name = Column(String(100))
+    toefl = Column(Float)
+    gre = Column(Float)
+    gpa = Column(Float)
+    status = Column(Enum(ApplicationStatus), default=ApplicationStatus.PENDING, nullable=False)
+    created_at = Column(DateTime, default=get_local_time)
+    updated_at = Column(DateTime, default=get_local_time, onupdate=get_local_time)
+    
+    # 关联关系
+    student = relationship("User")
+    school = relationship("School")
 
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
-    cursor.close()
+# 学生统计汇总表，按名称保存计数、成绩总和及直方图分组计数，随学生信息变更增量更新
+class StudentStatistic(Base):
+    __tablename__ = "student_statistics"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(Float, nullable=False, default=0)
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+# 数据库引擎和会话工厂统一在 utils/database.py 中创建
\ No newline at end of file
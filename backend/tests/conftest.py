@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# 测试使用临时数据库和较低的密码哈希迭代次数，须在导入应用之前设置
+_test_dir = tempfile.mkdtemp(prefix="study_abroad_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+os.environ["ADMISSION_MODEL_DIR"] = os.path.join(_test_dir, "admission")
+os.environ["PASSWORD_HASH_PROFILE"] = "fast"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from utils.database import SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    # 进入上下文时执行应用启动事件（数据库迁移）
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def db_engine(client):
+    return engine
+
+
+@pytest.fixture
+def count_statements(db_engine):
+    """返回上下文管理器，收集其中执行的SQL语句"""
+    @contextmanager
+    def _count_statements():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db_engine, "before_cursor_execute", before_cursor_execute)
+    return _count_statements
+
+
+@pytest.fixture
+def register(client):
+    """注册并登录用户，返回 (认证请求头, 用户ID, 用户名)"""
+    def _register(role: str, **extra):
+        username = f"{role}_{uuid.uuid4().hex[:8]}"
+        body = {
+            "username": username, "password": "pw123456", "role": role,
+            "name": extra.pop("name", username), "email": "test@example.com", "phone": "13800138000",
+            **extra
+        }
+        response = client.post("/auth/register", json=body)
+        assert response.status_code == 200, response.text
+        response = client.post("/auth/login", json={"username": username, "password": "pw123456", "role": role})
+        assert response.status_code == 200, response.text
+        data = response.json()
+        return {"Authorization": f"Bearer {data['access_token']}"}, data["user_id"], username
+    return _register
@@ -0,0 +1,70 @@
+import json
+import math
+import os
+import shutil
+
+import pytest
+
+from utils import admission
+from utils.config import settings
+
+PREDICT_PARAMS = {"toefl_min": 105, "gre_min": 325, "gpa_min": 3.6}
+
+
+@pytest.fixture
+def model_dir():
+    shutil.rmtree(settings.admission_model_dir, ignore_errors=True)
+    admission.reload_admission_model()
+    yield settings.admission_model_dir
+    shutil.rmtree(settings.admission_model_dir, ignore_errors=True)
+    admission.reload_admission_model()
+
+
+def _write_artifact(version: int):
+    os.makedirs(settings.admission_model_dir, exist_ok=True)
+    artifact = {
+        "format": admission.ARTIFACT_FORMAT, "version": version, "features": list(admission.FEATURES),
+        "mean": [100.0, 320.0, 3.5, math.log(50)], "scale": [10.0, 10.0, 0.3, 1.0],
+        "intercept": 0.0, "coefficients": [1.0, 1.0, 1.0, -1.0], "default_ranking": 50.0
+    }
+    with open(os.path.join(settings.admission_model_dir, f"admission_v{version}.json"), "w", encoding="utf-8") as f:
+        json.dump(artifact, f)
+
+
+def test_predict_falls_back_to_heuristic_without_model(client, register, model_dir):
+    headers, _, _ = register("teacher")
+    response = client.get("/teacher/statistics/predict", headers=headers, params=PREDICT_PARAMS)
+    assert response.status_code == 200, response.text
+    assert response.json()["success_rate"] == 95.0
+    assert response.json()["model_version"] is None
+
+    response = client.get("/teacher/statistics/predict", headers=headers, params={"toefl_min": 90})
+    assert response.json()["success_rate"] == 50.0
+
+
+def test_predict_uses_trained_model(client, register, model_dir):
+    headers, _, _ = register("teacher")
+    _write_artifact(1)
+    admission.reload_admission_model()
+    response = client.get("/teacher/statistics/predict", headers=headers, params=PREDICT_PARAMS)
+    assert response.status_code == 200, response.text
+    assert response.json()["model_version"] == 1
+
+
+def test_model_directory_is_checked_on_interval(model_dir, monkeypatch):
+    calls = []
+    list_versions = admission.artifact_versions
+    monkeypatch.setattr(admission, "artifact_versions", lambda: calls.append(1) or list_versions())
+    monkeypatch.setattr(settings, "admission_model_check_interval", 3600)
+
+    assert admission.reload_admission_model() is None
+    _write_artifact(1)
+    # 检查间隔内不再读取模型目录，新版本在下次检查或显式重新加载后生效
+    for _ in range(5):
+        assert admission.admission_model() is None
+    assert len(calls) == 1
+    assert admission.reload_admission_model().version == 1
+
+    _write_artifact(2)
+    monkeypatch.setattr(settings, "admission_model_check_interval", 0)
+    assert admission.admission_model().version == 2
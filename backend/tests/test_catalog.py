@@ -0,0 +1,58 @@
+import uuid
+
+
+def _add_school(client, headers, majors=None, major_rankings=""):
+    tag = uuid.uuid4().hex[:8]
+    body = {"chinese_name": f"专业大学{tag}", "english_name": f"Major {tag}", "location": "上海", "ranking": 300,
+            "major_rankings": major_rankings}
+    if majors is not None:
+        body["majors"] = [{"major_name": name, "major_rank": rank} for name, rank in majors]
+    response = client.post("/teacher/school/add", headers=headers, json=body)
+    assert response.status_code == 200, response.text
+    return response.json()["school_id"]
+
+
+def _edit_majors(client, count_statements, headers, school_id, majors):
+    with count_statements() as statements:
+        response = client.put(f"/teacher/school/edit/{school_id}", headers=headers, json={
+            "majors": [{"major_name": name, "major_rank": rank} for name, rank in majors]
+        })
+    assert response.status_code == 200, response.text
+    return response.json()["major_changes"], len(statements)
+
+
+def _major_rankings(client, headers, school_id):
+    response = client.get("/teacher/school/detail", headers=headers, params={"school_id": school_id})
+    return response.json()["major_rankings"]
+
+
+def test_major_edit_writes_only_changed_rows(client, register, count_statements):
+    headers, _, _ = register("teacher")
+    statement_counts = []
+    for size in (10, 200):
+        majors = [(f"专业{i}", i + 1) for i in range(size)]
+        school_id = _add_school(client, headers, majors)
+
+        changes, _ = _edit_majors(client, count_statements, headers, school_id, majors)
+        assert changes == {"inserted": 0, "updated": 0, "deleted": 0}
+
+        # 修改一个排名、删除一个专业、新增一个专业
+        edited = [("专业0", 500)] + majors[2:] + [("新专业", 999)]
+        changes, statements = _edit_majors(client, count_statements, headers, school_id, edited)
+        assert changes == {"inserted": 1, "updated": 1, "deleted": 1}
+        statement_counts.append(statements)
+        assert _major_rankings(client, headers, school_id).startswith("专业0：500；专业2：3")
+
+    # 语句数与专业数量无关
+    assert statement_counts[0] == statement_counts[1]
+
+
+def test_legacy_major_rankings_string(client, register):
+    headers, _, _ = register("teacher")
+    school_id = _add_school(client, headers, major_rankings="计算机：1；数学：2")
+    assert _major_rankings(client, headers, school_id) == "计算机：1；数学：2"
+
+    response = client.put(f"/teacher/school/edit/{school_id}", headers=headers, json={"major_rankings": "计算机：3"})
+    assert response.status_code == 200, response.text
+    assert response.json()["major_changes"] == {"inserted": 0, "updated": 1, "deleted": 1}
+    assert _major_rankings(client, headers, school_id) == "计算机：3"
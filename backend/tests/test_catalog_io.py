@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import uuid
+
+from utils.catalog_io import export_lines, import_catalog, iter_catalog
+
+
+def _import(client, headers, content, filename, **params):
+    response = client.post(
+        "/teacher/school/import", headers=headers, params=params,
+        files={"file": (filename, content.encode("utf-8"), "application/octet-stream")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _exported(client, headers, file_format):
+    response = client.get("/teacher/school/export", headers=headers, params={"format": file_format})
+    assert response.status_code == 200, response.text
+    return response.text
+
+
+def test_import_reports_errors_and_upserts_by_english_name(client, register):
+    headers, _, _ = register("teacher")
+    tag = uuid.uuid4().hex[:8]
+    existing = {"chinese_name": f"已有大学{tag}", "english_name": f"Existing {tag}", "location": "上海", "ranking": 10}
+    assert _import(client, headers, json.dumps(existing, ensure_ascii=False), "schools.jsonl")["inserted"] == 1
+
+    lines = [
+        {"chinese_name": f"导入大学{tag}", "english_name": f"Imported {tag}", "location": "纽约", "ranking": 20,
+         "majors": [{"name": "计算机", "rank": 1}, {"name": "数学", "rank": 2}]},
+        {**existing, "location": "北京", "majors": "物理：3"},
+        {"chinese_name": f"缺排名{tag}", "english_name": f"No Ranking {tag}", "location": "伦敦"},
+        {"chinese_name": existing["chinese_name"], "english_name": f"Conflict {tag}", "location": "上海", "ranking": 30},
+    ]
+    content = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines) + "\nnot json\n"
+    result = _import(client, headers, content, "schools.jsonl", batch_size=2)
+    assert (result["inserted"], result["updated"], result["error_count"]) == (1, 1, 3)
+    assert sorted(error["line"] for error in result["errors"]) == [3, 4, 5]
+    assert "已被学校" in next(error["error"] for error in result["errors"] if error["line"] == 4)
+
+    records = {
+        json.loads(line)["english_name"]: json.loads(line)
+        for line in _exported(client, headers, "jsonl").splitlines()
+    }
+    assert records[f"Imported {tag}"]["majors"] == [{"name": "计算机", "rank": 1}, {"name": "数学", "rank": 2}]
+    assert records[f"Existing {tag}"]["location"] == "北京"
+    assert records[f"Existing {tag}"]["majors"] == [{"name": "物理", "rank": 3}]
+    assert f"Conflict {tag}" not in records and f"No Ranking {tag}" not in records
+
+
+def test_csv_export_round_trips(client, register, db):
+    headers, _, _ = register("teacher")
+    tag = uuid.uuid4().hex[:8]
+    content = "\n".join(json.dumps({
+        "chinese_name": f"往返大学{tag}{i}", "english_name": f"Round Trip {tag} {i}", "location": "东京", "ranking": 100 + i,
+        "introduction": "逗号, 引号\" 和换行\n", "majors": [{"name": f"专业{j}", "rank": j + 1} for j in range(i)]
+    }, ensure_ascii=False) for i in range(3))
+    _import(client, headers, content, "schools.jsonl")
+
+    exported = _exported(client, headers, "csv")
+    assert next(csv.reader(io.StringIO(exported)))[-1] == "majors"
+
+    # 导出的CSV重新导入后所有学校均为更新，导出内容不变
+    result = import_catalog(db, io.StringIO(exported, newline=""), "csv", batch_size=2)
+    assert result["inserted"] == 0 and result["error_count"] == 0
+    assert "".join(export_lines(iter_catalog(db), "csv")) == exported
+
+
+def test_round_trip_keeps_student_school_list_working(client, register):
+    headers, _, _ = register("teacher")
+    student_headers, _, _ = register("student")
+    tag = uuid.uuid4().hex[:8]
+    response = client.post("/teacher/school/add", headers=headers, json={
+        "chinese_name": f"空简介大学{tag}", "english_name": f"Blank {tag}", "location": "悉尼", "ranking": 60
+    })
+    assert response.status_code == 200, response.text
+    # 新增学校时未提供简介和详细信息
+    _import(client, headers, json.dumps({
+        "chinese_name": f"无简介大学{tag}", "english_name": f"Bare {tag}", "location": "悉尼", "ranking": 61
+    }, ensure_ascii=False), "schools.jsonl")
+
+    result = _import(client, headers, _exported(client, headers, "csv"), "schools.csv")
+    assert result["inserted"] == 0 and result["error_count"] == 0
+
+    response = client.get("/student/schools", headers=student_headers)
+    assert response.status_code == 200, response.text
+    items = {school["english_name"]: school for school in response.json()}
+    assert (items[f"Blank {tag}"]["introduction"], items[f"Bare {tag}"]["details"]) == ("", "")
+    response = client.get("/student/search-schools", headers=student_headers, params={"q": tag})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
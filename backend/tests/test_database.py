@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+from sqlalchemy import exc, text
+
+from utils.database import create_database_engine, pool_stats
+
+
+def test_pool_counts_waits_and_timeouts(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.2)
+    try:
+        # 取出最后一个空闲连接不需要等待
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert pool_stats(engine)["waits"] == 0
+
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        stats = pool_stats(engine)
+        assert (stats["waits"], stats["timeouts"]) == (1, 1)
+
+        # 等待期间其他请求归还连接，只计入等待次数
+        connection = engine.connect()
+        timer = threading.Timer(0.05, connection.close)
+        timer.start()
+        with engine.connect():
+            pass
+        timer.join()
+        stats = pool_stats(engine)
+        assert (stats["checkouts"], stats["peak_checked_out"], stats["waits"], stats["timeouts"]) == (3, 1, 2, 1)
+    finally:
+        engine.dispose()
@@ -0,0 +1,145 @@
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+import db  # noqa: E402
+
+
+class FakeRoot:
+    """代替Tk主窗口：记录after()登记的回调，由pump()在测试线程中依次执行"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.errors = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def report_callback_exception(self, exc_type, exc_value, traceback):
+        self.errors.append(exc_value)
+
+    def pump(self, until, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.005)
+        assert until()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "viewer.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.executemany("INSERT INTO t (name) VALUES (?)", [(f"row{i}",) for i in range(500)])
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def worker(db_path):
+    root = FakeRoot()
+    worker = db.QueryWorker(root, db_path)
+    yield worker
+    worker.close()
+
+
+def test_poll_survives_failing_callback(worker):
+    root = worker.root
+    results = []
+
+    def closed_window(result):
+        raise RuntimeError("invalid command name")
+
+    worker.submit(lambda connection, job: 1, on_result=closed_window)
+    root.pump(lambda: root.errors)
+    # 回调出错后轮询仍在继续，之后的任务结果照常交回
+    worker.submit(lambda connection, job: 2, on_result=results.append)
+    root.pump(lambda: results)
+    assert results == [2]
+    assert isinstance(root.errors[0], RuntimeError)
+
+
+def test_export_worker_is_not_cancelled_by_queries(db_path):
+    root = FakeRoot()
+    query_worker = db.QueryWorker(root, db_path)
+    export_worker = db.QueryWorker(root, db_path)
+    events = []
+    try:
+        def export(connection, job):
+            time.sleep(0.2)
+            return connection.execute("SELECT count(*) FROM t").fetchone()[0]
+
+        export_worker.submit(export, on_result=lambda n: events.append(("export", n)),
+                             on_cancel=lambda: events.append("export cancelled"))
+        for page in range(3):
+            query_worker.submit(
+                lambda connection, job, page=page: db.query_page(connection, "SELECT * FROM t", {}, page, 10),
+                on_result=lambda result: events.append(("page", result[2][0][0]))
+            )
+        root.pump(lambda: ("export", 500) in events)
+        assert "export cancelled" not in events
+        assert ("page", 21) in events
+    finally:
+        query_worker.close()
+        export_worker.close()
+
+
+def test_query_page_with_trailing_comment(worker):
+    connection = sqlite3.connect(worker.db_path)
+    try:
+        total, columns, rows, plan, _ = db.query_page(
+            connection, "SELECT id, name FROM t WHERE id > :min -- 跳过前几行", {"min": 5}, 1, 10, count=True, explain=True
+        )
+    finally:
+        connection.close()
+    assert total == 495
+    assert columns == ["id", "name"]
+    assert rows[0] == (16, "row15")
+    assert len(rows) == 11
+    assert plan
+
+
+def test_fts_search_uses_school_search_index(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    from utils import migrations
+
+    path = tmp_path / "schools.db"
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.migrate(engine)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO schools (id, chinese_name, english_name, location, ranking, introduction) VALUES "
+            "(7, '哈佛大学', 'Harvard University', '美国', 1, ''), (8, '北京大学', 'Peking University', '北京', 2, '')"
+        ))
+    # 迁移5从已有学校数据建立检索表
+    search_migration = next(item for item in migrations.MIGRATIONS if item.version == 5)
+    with engine.begin() as connection:
+        search_migration.upgrade(connection)
+    engine.dispose()
+
+    connection = sqlite3.connect(path)
+    try:
+        fts = db.fts_source(connection, "schools")
+        assert fts[:1] == ("school_search",)
+        columns = db.table_columns(connection, "schools")
+        for column, keyword, expected in [
+            (db.ALL_COLUMNS, "哈佛大学", [7]), (db.ALL_COLUMNS, "university", [7, 8]),
+            ("chinese_name", "北京", [8]), ("location", "北京", [8]),
+        ]:
+            sql, params = db.build_search_query("schools", columns, column, "fts", keyword, fts)
+            assert [row[0] for row in connection.execute(sql + " ORDER BY id", params)] == expected, keyword
+
+        # 直接浏览检索表时同样按二元组构建查询
+        fts = db.fts_source(connection, "school_search")
+        sql, params = db.build_search_query("school_search", [], db.ALL_COLUMNS, "fts", "哈佛大学", fts)
+        assert [row[0] for row in connection.execute(sql.replace("SELECT *", "SELECT rowid"), params)] == [7]
+    finally:
+        connection.close()
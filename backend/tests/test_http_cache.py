@@ -0,0 +1,59 @@
+import time
+import uuid
+
+
+def _add_school(client, headers, tag, majors):
+    response = client.post("/teacher/school/add", headers=headers, json={
+        "chinese_name": f"缓存大学{tag}", "english_name": f"Cache {tag}", "location": "北京", "ranking": 900,
+        "majors": [{"major_name": name, "major_rank": rank} for name, rank in majors]
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["school_id"]
+
+
+def test_school_detail_last_modified_follows_major_changes(client, register):
+    teacher_headers, _, _ = register("teacher")
+    student_headers, _, _ = register("student")
+    school_id = _add_school(client, teacher_headers, uuid.uuid4().hex[:8], [("计算机", 1), ("数学", 2)])
+
+    targets = [
+        (f"/student/school/{school_id}", student_headers, {}),
+        ("/teacher/school/detail", teacher_headers, {"school_id": school_id}),
+    ]
+    last_modified = {}
+    for path, headers, params in targets:
+        response = client.get(path, headers=headers, params=params)
+        last_modified[path] = response.headers["Last-Modified"]
+        cached = client.get(path, headers={**headers, "If-Modified-Since": last_modified[path]}, params=params)
+        assert cached.status_code == 304
+
+    # HTTP日期精确到秒，等待进入下一秒后只删除一个专业
+    time.sleep(1.1)
+    response = client.put(f"/teacher/school/edit/{school_id}", headers=teacher_headers, json={
+        "majors": [{"major_name": "计算机", "major_rank": 1}]
+    })
+    assert response.status_code == 200, response.text
+
+    for path, headers, params in targets:
+        response = client.get(path, headers={**headers, "If-Modified-Since": last_modified[path]}, params=params)
+        assert response.status_code == 200, path
+        assert response.headers["Last-Modified"] != last_modified[path]
+
+
+def test_school_list_revalidates_after_delete(client, register):
+    teacher_headers, _, _ = register("teacher")
+    school_id = _add_school(client, teacher_headers, uuid.uuid4().hex[:8], [])
+
+    response = client.get("/api/schools")
+    etag = response.headers["ETag"]
+    assert client.get("/api/schools", headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.delete("/teacher/school/delete", headers=teacher_headers, params={"school_id": school_id})
+    assert response.status_code == 200, response.text
+
+    # 删除学校后，无论使用哪种条件请求头都应返回新的列表
+    response = client.get("/api/schools", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert school_id not in [school["id"] for school in response.json()]
+    response = client.get("/api/schools", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
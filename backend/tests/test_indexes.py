@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import text
+
+# 预约列表、个人信息和专业排名的常用查询，均应通过索引查找而不是全表扫描
+LOOKUPS = [
+    ("SELECT * FROM training_reservations WHERE student_id = 1 ORDER BY created_at DESC",
+     "ix_training_reservations_student_created"),
+    ("SELECT * FROM training_reservations WHERE teacher_id = 1 AND status = 'PENDING' ORDER BY created_at DESC",
+     "ix_training_reservations_teacher_status_created"),
+    ("SELECT * FROM training_reservations WHERE teacher_id = 1 ORDER BY created_at DESC",
+     "ix_training_reservations_teacher_status_created"),
+    ("SELECT * FROM document_reservations WHERE student_id = 1 ORDER BY created_at DESC",
+     "ix_document_reservations_student_created"),
+    ("SELECT * FROM document_reservations WHERE teacher_id = 1 AND status = 'PENDING' ORDER BY created_at DESC",
+     "ix_document_reservations_teacher_status_created"),
+    ("SELECT * FROM student_profiles WHERE user_id = 1", "ix_student_profiles_user_id"),
+    ("SELECT * FROM teacher_profiles WHERE user_id = 1", "ix_teacher_profiles_user_id"),
+    ("SELECT * FROM school_majors WHERE school_id = 1", "ix_school_majors_school_id"),
+]
+
+
+@pytest.mark.parametrize("sql, index_name", LOOKUPS)
+def test_lookup_uses_index(db, sql, index_name):
+    plan = [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    assert any(detail.startswith("SEARCH") and f"INDEX {index_name}" in detail for detail in plan), plan
+    assert not any(detail.startswith("SCAN") for detail in plan), plan
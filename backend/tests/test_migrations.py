@@ -0,0 +1,83 @@
+from sqlalchemy import create_engine, inspect, text
+
+from models.database import Base
+from utils import migrations
+from utils.statistics import check_statistics
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)}
+        )
+        for table in inspector.get_table_names()
+        if table != migrations.SCHEMA_VERSION_TABLE and not table.startswith("school_search")
+    }
+
+
+def test_migrations_match_models_and_are_repeatable(tmp_path):
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    assert migrations.migrate(migrated) == migrations.latest_version()
+    assert migrations.migrate(migrated) == migrations.latest_version()
+
+    # 逐个迁移得到的表、列和索引与按当前模型建表一致
+    reference = create_engine(f"sqlite:///{tmp_path / 'reference.db'}")
+    Base.metadata.create_all(reference)
+    assert _schema(migrated) == _schema(reference)
+    assert "school_search" in inspect(migrated).get_table_names()
+
+    # 迁移可在已有数据表（迁移机制引入前创建）的数据库上重复执行
+    with migrated.begin() as connection:
+        for item in migrations.MIGRATIONS:
+            item.upgrade(connection)
+    assert _schema(migrated) == _schema(reference)
+
+
+def test_statistics_migration_matches_live_counters(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'statistics.db'}")
+    with engine.begin() as connection:
+        for item in migrations.MIGRATIONS[:2]:
+            item.upgrade(connection)
+        connection.execute(text("INSERT INTO users (id, username, password, role) VALUES (1, 'u', 'x', 'STUDENT')"))
+        connection.execute(
+            text("INSERT INTO student_profiles (user_id, name, gender, toefl, gre, gpa) VALUES (1, :name, :gender, :toefl, :gre, :gpa)"),
+            [
+                {"name": "a", "gender": "男", "toefl": 100, "gre": 320, "gpa": 3.5},
+                {"name": "b", "gender": "女", "toefl": 120, "gre": None, "gpa": 0},
+                {"name": "c", "gender": None, "toefl": 0, "gre": 260, "gpa": 4.0},
+            ]
+        )
+        migrations.MIGRATIONS[2].upgrade(connection)
+        assert check_statistics(connection) == {}
+
+
+def test_search_migration_is_retried_when_fts5_becomes_available(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    search_migration = next(item for item in migrations.MIGRATIONS if item.version == 5)
+
+    def without_fts5(connection):
+        raise migrations.MigrationDeferred("SQLite 不支持 FTS5")
+
+    # 模拟SQLite未编译FTS5：迁移5不记录版本，学校数据照常写入
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        item._replace(upgrade=without_fts5) if item is search_migration else item for item in migrations.MIGRATIONS
+    ])
+    migrations.migrate(engine)
+    with engine.begin() as connection:
+        assert 5 not in migrations.applied_versions(connection)
+        assert "school_search" not in inspect(connection).get_table_names()
+        connection.execute(text(
+            "INSERT INTO schools (id, chinese_name, english_name, location, ranking) VALUES (3, '哈佛大学', 'Harvard', '美国', 1)"
+        ))
+
+    # FTS5可用后再次执行迁移时创建检索表，并按迁移时的分词方式建立索引
+    monkeypatch.undo()
+    assert migrations.migrate(engine) == migrations.latest_version()
+    with engine.connect() as connection:
+        assert 5 in migrations.applied_versions(connection)
+        rows = connection.execute(text(
+            "SELECT rowid FROM school_search WHERE school_search MATCH :query"
+        ), {"query": '"哈佛 佛大 大学"'}).fetchall()
+    assert rows == [(3,)]
@@ -0,0 +1,58 @@
+import base64
+import json
+import uuid
+
+from utils import pagination
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_cursor_total_counts_all_rows_on_later_pages(client, register):
+    headers, _, _ = register("teacher")
+    tag = uuid.uuid4().hex[:8]
+    for i in range(5):
+        register("student", name=f"{tag}_{i}")
+
+    params = {"search": tag, "cursor": "", "page_size": 2, "include_total": True}
+    first = client.get("/teacher/students/list", headers=headers, params=params).json()
+    assert first["total_count"] == 5
+
+    # 第二页时近似总数缓存未命中，总数仍应为全部匹配行数
+    pagination._count_cache.clear()
+    second = client.get(
+        "/teacher/students/list", headers=headers, params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    assert second["total_count"] == 5
+    assert len(second["students"]) == 2
+
+
+def test_school_cursor_total_counts_all_rows_on_later_pages(client, register):
+    headers, _, _ = register("teacher")
+    tag = uuid.uuid4().hex[:8]
+    for i in range(3):
+        response = client.post("/teacher/school/add", headers=headers, json={
+            "chinese_name": f"分页大学{tag}{i}", "english_name": f"Paging {tag} {i}",
+            "location": tag, "ranking": 500 + i
+        })
+        assert response.status_code == 200, response.text
+
+    params = {"search": tag, "cursor": "", "page_size": 1, "include_total": True}
+    first = client.get("/teacher/school/list", headers=headers, params=params).json()
+    pagination._count_cache.clear()
+    second = client.get(
+        "/teacher/school/list", headers=headers, params={**params, "cursor": first["next_cursor"]}
+    ).json()
+    assert second["total_count"] == 3
+
+
+def test_malformed_cursor_values_are_rejected(client, register):
+    headers, _, _ = register("teacher")
+    for cursor in ("garbage", _raw_cursor([{}]), _raw_cursor(["1"]), _raw_cursor([True])):
+        response = client.get("/teacher/students/list", headers=headers, params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+    response = client.get("/teacher/school/list", headers=headers, params={"cursor": _raw_cursor([1, None])})
+    assert response.status_code == 400
+    response = client.get("/api/schools", params={"cursor": _raw_cursor([[1]])})
+    assert response.status_code == 400
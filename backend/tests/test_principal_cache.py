@@ -0,0 +1,56 @@
+from models.database import User, UserRole
+from utils.cache import principal_cache
+
+
+def _user(db, user_id):
+    return db.query(User).filter(User.id == user_id).one()
+
+
+def test_principal_is_cached_and_evicted_on_user_changes(client, db, register):
+    headers, user_id, username = register("student")
+    assert client.get("/student/profile", headers=headers).status_code == 200
+    assert principal_cache.get(username) is not None
+
+    # 修改角色后缓存失效，原令牌不再具有学生权限
+    user = _user(db, user_id)
+    user.role = UserRole.TEACHER
+    db.commit()
+    assert principal_cache.get(username) is None
+    assert client.get("/student/profile", headers=headers).status_code == 403
+    assert client.get("/student/school/1", headers=headers).status_code == 403
+
+    user.role = UserRole.STUDENT
+    db.commit()
+    assert client.get("/student/profile", headers=headers).status_code == 200
+    assert principal_cache.get(username) is not None
+
+    # 修改密码同样使缓存失效
+    user.password = "changed"
+    db.commit()
+    assert principal_cache.get(username) is None
+
+
+def test_principal_evicted_when_expired_user_is_renamed(client, db, register):
+    headers, user_id, username = register("student")
+    user = _user(db, user_id)
+    db.commit()
+    assert client.get("/student/profile", headers=headers).status_code == 200
+    assert principal_cache.get(username) is not None
+
+    # 提交后属性已过期，直接修改用户名时修改历史中没有旧用户名
+    user.username = username + "_renamed"
+    db.commit()
+    assert principal_cache.get(username) is None
+    assert client.get("/student/profile", headers=headers).status_code == 401
+
+
+def test_async_student_endpoints_use_cached_principal(client, register):
+    headers, _, username = register("student")
+    principal_cache.pop(username)
+    assert client.get("/student/schools", headers=headers, params={"limit": 1}).status_code == 200
+    assert principal_cache.get(username) is not None
+    assert client.get("/student/schools", headers=headers, params={"limit": 1}).status_code == 200
+
+    teacher_headers, _, _ = register("teacher")
+    assert client.get("/student/schools", headers=teacher_headers).status_code == 403
+    assert client.get("/student/schools", headers={"Authorization": "Bearer invalid"}).status_code == 401
@@ -0,0 +1,36 @@
+def _reserve(client, register, teacher_id, count):
+    for _ in range(count):
+        headers, _, _ = register("student", toefl=100, gre=320)
+        response = client.post("/student/training/reserve", headers=headers, json={
+            "teacher_id": teacher_id, "total_hours": 10, "training_type": "托福"
+        })
+        assert response.status_code == 200, response.text
+        response = client.post("/student/document/reserve", headers=headers, json={
+            "teacher_id": teacher_id, "document_count": 1, "document_type": "PS", "target_school": "MIT"
+        })
+        assert response.status_code == 200, response.text
+
+
+def _statement_count(client, count_statements, headers, path):
+    with count_statements() as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(response.json()), len(statements)
+
+
+def test_reservation_lists_use_constant_statement_count(client, register, count_statements):
+    headers, teacher_id, _ = register("teacher")
+    for path in ("/teacher/training/list", "/teacher/document/list"):
+        # 预热一次请求，使认证用户进入缓存，之后的统计只包含列表查询本身
+        client.get(path, headers=headers)
+
+    _reserve(client, register, teacher_id, 2)
+    small = {path: _statement_count(client, count_statements, headers, path)
+             for path in ("/teacher/training/list", "/teacher/document/list")}
+
+    _reserve(client, register, teacher_id, 8)
+    for path, (rows, statements) in small.items():
+        large_rows, large_statements = _statement_count(client, count_statements, headers, path)
+        assert (rows, large_rows) == (2, 10)
+        # 语句数不随预约条数增长，逐条查询学生信息的写法会在这里失败
+        assert large_statements == statements, path
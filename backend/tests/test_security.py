@@ -0,0 +1,26 @@
+import asyncio
+
+from utils import security
+
+
+def test_register_hashes_on_password_executor(register, monkeypatch):
+    calls = []
+    submit = security._password_executor.submit
+    monkeypatch.setattr(security._password_executor, "submit", lambda fn, *args: calls.append(fn) or submit(fn, *args))
+
+    # 注册时的哈希计算也受专用线程池大小的限制，不占用请求线程池
+    register("teacher")
+    assert security.pwd_context.hash in calls
+    calls.clear()
+
+    hashed = security.get_password_hash("pw123456")
+    assert security.verify_password("pw123456", hashed)
+    assert not security.verify_password("wrong", hashed)
+    assert len(calls) == 3
+
+
+def test_async_verify_rehashes_outdated_hash():
+    outdated = security.create_password_context(security.password_hash_rounds() + 1).hash("pw123456")
+    valid, new_hash = asyncio.run(security.verify_and_update_password_async("pw123456", outdated))
+    assert valid and new_hash is not None
+    assert asyncio.run(security.verify_and_update_password_async("pw123456", new_hash)) == (True, None)
@@ -0,0 +1,26 @@
+from models.database import StudentProfile
+from utils.statistics import check_statistics
+
+
+def test_statistics_follow_changes_to_expired_profiles(db, register):
+    _, user_id, _ = register("student", gender="男", toefl=100, gre=320, gpa=3.5)
+    assert check_statistics(db.connection()) == {}
+    db.commit()
+
+    profile = db.query(StudentProfile).filter(StudentProfile.user_id == user_id).one()
+    db.commit()
+    # 提交后属性均已过期，只修改一个字段时其余字段和旧值都未加载
+    profile.toefl = 110
+    db.commit()
+    assert check_statistics(db.connection()) == {}
+    db.commit()
+
+    profile.gender = "女"
+    profile.gpa = None
+    db.commit()
+    assert check_statistics(db.connection()) == {}
+    db.commit()
+
+    db.delete(profile)
+    db.commit()
+    assert check_statistics(db.connection()) == {}
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+from models.database import Application, ApplicationStatus, School
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# 模型文件格式版本，字段变化时递增
+ARTIFACT_FORMAT = 1
+
+# 模型特征：学生成绩和学校排名的对数
+FEATURES = ("toefl", "gre", "gpa", "log_ranking")
+
+# 训练时的L2正则化系数，样本较少时防止系数过大
+DEFAULT_L2 = 1.0
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -500, 500)))
+
+
+def fit_logistic_regression(X: np.ndarray, y: np.ndarray, l2: float = DEFAULT_L2, max_iter: int = 100, tol: float = 1e-8) -> np.ndarray:
+    """使用牛顿法拟合带L2正则化的逻辑回归，返回 [截距, 系数...]；截距不参与正则化"""
+    A = np.hstack([np.ones((X.shape[0], 1)), X])
+    penalty = np.full(A.shape[1], float(l2))
+    penalty[0] = 0.0
+    weights = np.zeros(A.shape[1])
+    for _ in range(max_iter):
+        p = _sigmoid(A @ weights)
+        gradient = A.T @ (p - y) + penalty * weights
+        hessian = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    return weights
+
+
+class AdmissionModel:
+    """录取预测模型，由训练生成的模型文件加载，对学生 × 学校批量计算录取概率"""
+
+    def __init__(self, artifact: dict):
+        if artifact.get("format") != ARTIFACT_FORMAT or tuple(artifact.get("features", ())) != FEATURES:
+            raise ValueError("不支持的录取预测模型文件")
+        self.version = artifact["version"]
+        self.artifact = artifact
+        self.mean = np.asarray(artifact["mean"], dtype=float)
+        self.scale = np.asarray(artifact["scale"], dtype=float)
+        self.intercept = float(artifact["intercept"])
+        self.coefficients = np.asarray(artifact["coefficients"], dtype=float)
+        self.default_ranking = float(artifact["default_ranking"])
+
+    def _student_logits(self, toefl, gre, gpa) -> np.ndarray:
+        # 缺失的成绩按训练样本均值处理，即对预测结果不产生影响
+        scores = np.column_stack([np.asarray(v, dtype=float).ravel() for v in (toefl, gre, gpa)])
+        scores = np.where(np.isnan(scores), self.mean[:3], scores)
+        return ((scores - self.mean[:3]) / self.scale[:3]) @ self.coefficients[:3]
+
+    def _school_logits(self, rankings) -> np.ndarray:
+        rankings = np.asarray(rankings, dtype=float).ravel()
+        rankings = np.where(np.isnan(rankings) | (rankings <= 0), self.default_ranking, rankings)
+        return (np.log(rankings) - self.mean[3]) / self.scale[3] * self.coefficients[3]
+
+    def score_matrix(self, toefl: Sequence[float], gre: Sequence[float], gpa: Sequence[float], rankings: Sequence[float]) -> np.ndarray:
+        """一次性计算 学生 × 学校 的录取概率矩阵；学生和学校特征相互独立，只需一次外加"""
+        logits = self._student_logits(toefl, gre, gpa)[:, None] + self._school_logits(rankings)[None, :] + self.intercept
+        return _sigmoid(logits)
+
+
+def _artifact_path(version: int) -> str:
+    return os.path.join(settings.admission_model_dir, f"admission_v{version}.json")
+
+
+def artifact_versions() -> List[int]:
+    if not os.path.isdir(settings.admission_model_dir):
+        return []
+    versions = []
+    for name in os.listdir(settings.admission_model_dir):
+        if name.startswith("admission_v") and name.endswith(".json"):
+            try:
+                versions.append(int(name[len("admission_v"):-len(".json")]))
+            except ValueError:
+                continue
+    return sorted(versions)
+
+
+def load_training_data(connection):
+    """读取已有结果的申请记录，返回特征矩阵和录取结果；缺少成绩的记录不参与训练"""
+    rows = connection.execute(
+        select(Application.toefl, Application.gre, Application.gpa, School.ranking, Application.status)
+        .join(School, School.id == Application.school_id)
+        .where(Application.status.in_([ApplicationStatus.ADMITTED, ApplicationStatus.REJECTED]))
+        .where(Application.toefl.isnot(None), Application.gre.isnot(None), Application.gpa.isnot(None))
+    ).all()
+    features = np.array([(row[0], row[1], row[2], row[3] or np.nan) for row in rows], dtype=float).reshape(-1, 4)
+    outcomes = np.array([row[4] == ApplicationStatus.ADMITTED for row in rows], dtype=float)
+    return features, outcomes
+
+
+def train(connection, l2: float = DEFAULT_L2) -> dict:
+    """使用历史申请结果训练模型，保存为新版本的模型文件并返回模型内容"""
+    features, outcomes = load_training_data(connection)
+    if len(outcomes) < 2 or outcomes.min() == outcomes.max():
+        raise ValueError("训练数据不足：需要同时包含录取和拒绝的申请记录")
+
+    rankings = features[:, 3]
+    valid_rankings = rankings[~np.isnan(rankings) & (rankings > 0)]
+    default_ranking = float(np.median(valid_rankings)) if valid_rankings.size else 100.0
+    features[:, 3] = np.log(np.where(np.isnan(rankings) | (rankings <= 0), default_ranking, rankings))
+
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    weights = fit_logistic_regression((features - mean) / scale, outcomes, l2)
+
+    p = _sigmoid(((features - mean) / scale) @ weights[1:] + weights[0])
+    eps = 1e-12
+    log_loss = float(-np.mean(outcomes * np.log(p + eps) + (1 - outcomes) * np.log(1 - p + eps)))
+
+    versions = artifact_versions()
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": (versions[-1] + 1) if versions else 1,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "features": list(FEATURES),
+        "mean": mean.tolist(),
+        "scale": scale.tolist(),
+        "intercept": float(weights[0]),
+        "coefficients": weights[1:].tolist(),
+        "default_ranking": default_ranking,
+        "l2": l2,
+        "samples": int(len(outcomes)),
+        "admitted": int(outcomes.sum()),
+        "metrics": {
+            "log_loss": round(log_loss, 6),
+            "accuracy": round(float(np.mean((p >= 0.5) == outcomes)), 6)
+        }
+    }
+
+    os.makedirs(settings.admission_model_dir, exist_ok=True)
+    path = _artifact_path(artifact["version"])
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+    reload_admission_model()
+    return artifact
+
+
+_model: Optional[AdmissionModel] = None
+_model_checked_at: Optional[float] = None
+_model_lock = threading.Lock()
+
+
+def admission_model() -> Optional[AdmissionModel]:
+    """返回最新版本的录取预测模型；按 admission_model_check_interval 间隔检查模型目录，发现新版本时加载；尚未训练时返回None"""
+    global _model, _model_checked_at
+    checked_at = _model_checked_at
+    if checked_at is not None and time.monotonic() - checked_at < settings.admission_model_check_interval:
+        return _model
+    with _model_lock:
+        if _model_checked_at is None or time.monotonic() - _model_checked_at >= settings.admission_model_check_interval:
+            versions = artifact_versions()
+            if not versions:
+                _model = None
+            elif _model is None or _model.version != versions[-1]:
+                with open(_artifact_path(versions[-1]), encoding="utf-8") as f:
+                    _model = AdmissionModel(json.load(f))
+                logger.info("已加载录取预测模型 v%s", _model.version)
+            _model_checked_at = time.monotonic()
+    return _model
+
+
+def reload_admission_model() -> Optional[AdmissionModel]:
+    """立即重新检查模型目录，返回最新版本的模型"""
+    global _model_checked_at
+    with _model_lock:
+        _model_checked_at = None
+    return admission_model()
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "train":
+        l2 = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_L2
+        with engine.connect() as connection:
+            try:
+                artifact = train(connection, l2)
+            except ValueError as e:
+                print(e)
+                sys.exit(1)
+        print(f"录取预测模型 v{artifact['version']} 训练完成，样本 {artifact['samples']}，指标 {artifact['metrics']}")
+    else:
+        print("用法: python -m utils.admission train [l2]")
+        sys.exit(2)
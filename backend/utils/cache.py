@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models.database import School, SchoolMajor, User
+from .config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """线程安全的LRU缓存，条目超过有效期后失效"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        # 指定generation时，若缓存在加载期间被清空则不回写，避免保存过期数据
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        generation = self._generation
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, generation)
+        return value
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0
+            }
+
+
+# 学校目录缓存，学校或专业数据提交后整体失效
+catalog_cache = TTLCache(settings.catalog_cache_size, settings.catalog_cache_ttl)
+
+# 认证用户缓存，按用户名缓存已验证的用户，用户信息变更提交后失效
+principal_cache = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
+_catalog_listeners: List[Callable[[], None]] = [catalog_cache.clear]
+
+
+# 注册学校目录变更回调，在学校或专业数据提交后调用
+def on_catalog_change(callback: Callable[[], None]):
+    _catalog_listeners.append(callback)
+
+
+def invalidate_catalog():
+    for callback in _catalog_listeners:
+        callback()
+
+
+# 标记会话修改了学校目录，用于绕过ORM的批量更新/删除
+def mark_catalog_changed(session: Session):
+    session.info["catalog_changed"] = True
+
+
+# 用户名属性已过期或未加载时（如提交后再修改），修改历史中没有原用户名，flush前从数据库读取
+@event.listens_for(Session, "before_flush")
+def _load_committed_usernames(session, flush_context, instances):
+    user_ids = []
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            history = state.attrs.username.history
+            if state.key is not None and not history.deleted and not history.unchanged:
+                user_ids.append(state.identity[0])
+    if user_ids:
+        session.info.setdefault("changed_usernames", set()).update(
+            session.execute(select(User.username).where(User.id.in_(user_ids))).scalars()
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, (School, SchoolMajor)) for obj in changed):
+        session.info["catalog_changed"] = True
+
+    # 记录密码、角色或用户名发生变更的用户（包括修改前后的用户名）
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.username.history
+            usernames = session.info.setdefault("changed_usernames", set())
+            usernames.update(history.added or (), history.unchanged or (), history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session):
+    if session.info.pop("catalog_changed", False):
+        invalidate_catalog()
+    for username in session.info.pop("changed_usernames", ()):
+        principal_cache.pop(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session):
+    session.info.pop("catalog_changed", None)
+    session.info.pop("changed_usernames", None)
@@ -0,0 +1,255 @@
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from models.database import School, SchoolMajor, get_local_time
+from .cache import catalog_cache, mark_catalog_changed
+from .pagination import decode_cursor, encode_cursor
+from .search import sync_schools
+
+# 学校列表可投影的字段
+SCHOOL_FIELDS = (
+    "id", "chinese_name", "english_name", "location", "ranking",
+    "introduction", "details", "created_at", "updated_at"
+)
+
+# 流式导出时每批从数据库游标读取的行数
+STREAM_BATCH_SIZE = 500
+
+
+# 所有学校ID（按ID升序），缓存于学校目录缓存
+def catalog_school_ids(db: Session) -> List[int]:
+    return catalog_cache.get_or_load(
+        ("school_ids",),
+        lambda: [row.id for row in db.query(School.id).order_by(School.id)]
+    )
+
+
+async def async_catalog_school_ids(db: AsyncSession) -> List[int]:
+    generation = catalog_cache.generation
+    school_ids = catalog_cache.get(("school_ids",))
+    if school_ids is None:
+        result = await db.execute(select(School.id).order_by(School.id))
+        school_ids = list(result.scalars())
+        catalog_cache.set(("school_ids",), school_ids, generation)
+    return school_ids
+
+
+def _school_payload(school: School) -> dict:
+    payload = {column: getattr(school, column) for column in SCHOOL_FIELDS}
+    payload["majors"] = [(major.major_name, major.major_rank) for major in school.majors]
+    return payload
+
+
+def _cached_payloads(school_ids: Iterable[int]) -> Tuple[Dict[int, dict], List[int]]:
+    payloads = {}
+    missing = []
+    for school_id in school_ids:
+        payload = catalog_cache.get(("school", school_id))
+        if payload is None:
+            missing.append(school_id)
+        else:
+            payloads[school_id] = payload
+    return payloads, missing
+
+
+def _cache_payloads(schools: Iterable[School], payloads: Dict[int, dict], generation: int):
+    for school in schools:
+        payload = _school_payload(school)
+        catalog_cache.set(("school", school.id), payload, generation)
+        payloads[school.id] = payload
+
+
+def _schools_statement(school_ids: Sequence[int]):
+    return select(School).options(selectinload(School.majors)).where(School.id.in_(school_ids))
+
+
+# 批量获取学校完整信息（含专业名称和排名），优先读取缓存，只查询未命中的学校
+# 返回的字典为共享缓存数据，调用方不应修改
+def school_payloads(db: Session, school_ids: Iterable[int]) -> Dict[int, dict]:
+    generation = catalog_cache.generation
+    payloads, missing = _cached_payloads(school_ids)
+    if missing:
+        _cache_payloads(db.execute(_schools_statement(missing)).scalars(), payloads, generation)
+    return payloads
+
+
+async def async_school_payloads(db: AsyncSession, school_ids: Iterable[int]) -> Dict[int, dict]:
+    generation = catalog_cache.generation
+    payloads, missing = _cached_payloads(school_ids)
+    if missing:
+        result = await db.execute(_schools_statement(missing))
+        _cache_payloads(result.scalars(), payloads, generation)
+    return payloads
+
+
+def school_payload(db: Session, school_id: int) -> Optional[dict]:
+    return school_payloads(db, [school_id]).get(school_id)
+
+
+async def async_school_payload(db: AsyncSession, school_id: int) -> Optional[dict]:
+    return (await async_school_payloads(db, [school_id])).get(school_id)
+
+
+# 解析字段投影参数，如 "id,chinese_name,ranking"；id始终返回，用于游标分页
+def parse_fields(fields: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    if not fields:
+        return list(default)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的字段: {', '.join(unknown)}"
+        )
+    if "id" not in selected:
+        selected.insert(0, "id")
+    return list(dict.fromkeys(selected))
+
+
+# 构建只包含所需列的学校查询，按ID升序，支持游标分页
+def school_rows_statement(fields: Sequence[str], cursor: Optional[str] = None):
+    statement = select(*[getattr(School, f) for f in fields if f in SCHOOL_FIELDS])
+    after = decode_cursor(cursor, 1)
+    if after is not None:
+        statement = statement.where(School.id > after[0])
+    return statement.order_by(School.id)
+
+
+# 批量加载学校的专业信息
+async def load_majors(db: AsyncSession, school_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    majors: Dict[int, List[dict]] = {}
+    school_ids = list(school_ids)
+    if not school_ids:
+        return majors
+    result = await db.execute(
+        select(SchoolMajor.school_id, SchoolMajor.major_name, SchoolMajor.major_rank)
+        .where(SchoolMajor.school_id.in_(school_ids))
+        .order_by(SchoolMajor.id)
+    )
+    for row in result:
+        majors.setdefault(row.school_id, []).append({"name": row.major_name, "rank": row.major_rank})
+    return majors
+
+
+def serialize_row(row, fields: Sequence[str]) -> dict:
+    data = {}
+    for f in fields:
+        if f == "majors":
+            continue
+        value = getattr(row, f)
+        data[f] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+async def _serialize_batch(db: AsyncSession, rows, fields: Sequence[str]) -> List[dict]:
+    items = [serialize_row(row, fields) for row in rows]
+    if "majors" in fields:
+        majors = await load_majors(db, [item["id"] for item in items])
+        for item in items:
+            item["majors"] = majors.get(item["id"], [])
+    return items
+
+
+# 分页返回学校列表，下一页游标放在响应头 X-Next-Cursor 中，响应体仍为数组
+async def paginated_response(db: AsyncSession, fields: Sequence[str], cursor: Optional[str], limit: int) -> JSONResponse:
+    result = await db.execute(school_rows_statement(fields, cursor).limit(limit + 1))
+    rows = result.all()
+    items = await _serialize_batch(db, rows[:limit], fields)
+    headers = {}
+    if len(rows) > limit:
+        headers["X-Next-Cursor"] = encode_cursor([items[-1]["id"]])
+    return JSONResponse(content=items, headers=headers)
+
+
+# 以NDJSON格式流式导出学校，逐批读取数据库游标，不在内存中构建完整列表
+def ndjson_response(db: AsyncSession, fields: Sequence[str], cursor: Optional[str] = None, limit: Optional[int] = None) -> StreamingResponse:
+    statement = school_rows_statement(fields, cursor)
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    async def generate() -> AsyncIterator[str]:
+        result = await db.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for batch in result.partitions():
+            for item in await _serialize_batch(db, batch, fields):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+# 解析旧版专业排名字符串，格式如："计算机：10；商科：20；工程：15"，跳过格式无效的项
+def parse_major_rankings(major_rankings: Optional[str]) -> List[Tuple[str, int]]:
+    majors = []
+    for pair in (major_rankings or "").split("；"):
+        if "：" not in pair:
+            continue
+        try:
+            major_name, major_rank_str = pair.split("：")
+            major_rank = int(major_rank_str.strip())
+        except (ValueError, IndexError):
+            continue
+        if major_name.strip() and major_rank > 0:
+            majors.append((major_name.strip(), major_rank))
+    return majors
+
+
+# 将多所学校的专业排名同步为给定列表：与现有记录比较，只批量插入、更新、删除有变化的行
+# 同名专业以最后一项为准；批量语句不经过ORM事件，需手动同步搜索索引（调用方自行重新索引时可跳过）并使学校目录缓存失效
+def sync_majors(db: Session, majors_by_school: Dict[int, Iterable[Tuple[str, int]]], sync_index: bool = True) -> Dict[str, int]:
+    desired = {
+        school_id: {major_name: major_rank for major_name, major_rank in majors}
+        for school_id, majors in majors_by_school.items()
+    }
+    existing: Dict[int, Dict[str, Tuple[int, int]]] = {school_id: {} for school_id in desired}
+    delete_ids, changed = [], set()
+    if desired:
+        for major_id, school_id, major_name, major_rank in db.execute(
+            select(SchoolMajor.id, SchoolMajor.school_id, SchoolMajor.major_name, SchoolMajor.major_rank)
+            .where(SchoolMajor.school_id.in_(list(desired)))
+            .order_by(SchoolMajor.id)
+        ):
+            if major_name in existing[school_id]:
+                delete_ids.append(major_id)
+                changed.add(school_id)
+            else:
+                existing[school_id][major_name] = (major_id, major_rank)
+
+    now = get_local_time()
+    inserts, updates = [], []
+    for school_id, majors in desired.items():
+        current = existing[school_id]
+        for major_name, major_rank in majors.items():
+            if major_name not in current:
+                inserts.append({"school_id": school_id, "major_name": major_name, "major_rank": major_rank, "created_at": now, "updated_at": now})
+                changed.add(school_id)
+            elif current[major_name][1] != major_rank:
+                updates.append({"id": current[major_name][0], "major_rank": major_rank, "updated_at": now})
+                changed.add(school_id)
+        stale = [major_id for major_name, (major_id, _) in current.items() if major_name not in majors]
+        if stale:
+            delete_ids.extend(stale)
+            changed.add(school_id)
+
+    if delete_ids:
+        db.execute(delete(SchoolMajor).where(SchoolMajor.id.in_(delete_ids)))
+    if updates:
+        db.execute(update(SchoolMajor), updates)
+    if inserts:
+        db.execute(insert(SchoolMajor), inserts)
+    if changed:
+        # 专业排名属于学校详情的一部分，同时更新学校的updated_at，使Last-Modified能反映专业的增删改
+        db.execute(update(School).where(School.id.in_(changed)).values(updated_at=now))
+        if sync_index:
+            sync_schools(db, changed)
+        mark_catalog_changed(db)
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(delete_ids)}
+
+
+def sync_school_majors(db: Session, school_id: int, majors: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    return sync_majors(db, {school_id: majors})
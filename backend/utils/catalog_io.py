@@ -0,0 +1,278 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, ValidationError, validator
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.database import School, SchoolMajor, get_local_time
+from .catalog import STREAM_BATCH_SIZE, parse_major_rankings, sync_majors
+from .cache import mark_catalog_changed
+from .search import sync_schools
+
+# 支持的导入导出格式
+CATALOG_FORMATS = ("csv", "jsonl")
+
+# 导入导出的学校字段，CSV文件按此顺序输出列，专业排名放在最后一列
+CATALOG_FIELDS = ("chinese_name", "english_name", "location", "ranking", "introduction", "details")
+CSV_COLUMNS = CATALOG_FIELDS + ("majors",)
+
+# 新增学校时未提供的文本字段写入的值；已有学校只更新记录中提供的字段
+TEXT_DEFAULTS = {"introduction": "", "details": ""}
+
+# 导入时每批校验和写入的行数，每批单独提交
+IMPORT_BATCH_SIZE = 500
+
+# 导入结果中最多返回的错误行数
+MAX_REPORTED_ERRORS = 100
+
+
+class CatalogMajor(BaseModel):
+    """导入的专业排名，与学校列表NDJSON导出的格式一致"""
+    name: str = Field(..., min_length=1, max_length=100, description="专业名称")
+    rank: int = Field(..., gt=0, description="专业排名")
+
+
+class CatalogRecord(BaseModel):
+    """导入的学校记录；未提供majors时保留学校现有的专业排名"""
+    chinese_name: str = Field(..., min_length=1, max_length=100, description="学校中文名称")
+    english_name: str = Field(..., min_length=1, max_length=200, description="学校英文名称")
+    location: str = Field(..., min_length=1, max_length=100, description="学校所在地")
+    ranking: int = Field(..., gt=0, description="学校排名")
+    introduction: str = Field("", description="学校介绍")
+    details: str = Field("", description="学校详细信息")
+    majors: Optional[Union[List[CatalogMajor], str]] = Field(None, description="专业排名列表，或“专业名称：排名；…”格式的字符串")
+
+    # 与教师添加学校接口一致，介绍和详细信息为空时保存为空字符串（CSV空单元格读取为None）
+    @validator("introduction", "details", pre=True)
+    def empty_text(cls, value):
+        return "" if value is None else value
+
+    def major_pairs(self) -> Optional[List[Tuple[str, int]]]:
+        if self.majors is None:
+            return None
+        if isinstance(self.majors, str):
+            return parse_major_rankings(self.majors)
+        return [(major.name.strip(), major.rank) for major in self.majors]
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension in ("jsonl", "ndjson", "json"):
+            return "jsonl"
+        if extension == "csv":
+            return "csv"
+    return None
+
+
+# 逐行读取JSON Lines，返回 (行号, 原始记录)；无法解析的行返回错误信息
+def _read_jsonl(lines: Iterable[str]) -> Iterator[Tuple[int, Union[dict, str]]]:
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"JSON格式错误: {e}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "每行须为JSON对象"
+
+
+# 逐行读取CSV，首行为列名；空单元格写入空值，majors列为空表示清空专业排名，不含majors列时保留现有专业排名
+def _read_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Union[dict, str]]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        record = {
+            key: (value if value != "" or key == "majors" else None)
+            for key, value in row.items()
+            if key is not None
+        }
+        yield reader.line_num, record
+
+
+def read_records(lines: Iterable[str], file_format: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    return _read_jsonl(lines) if file_format == "jsonl" else _read_csv(lines)
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# 校验一批原始记录，返回有效记录和错误；同一英文名以最后一行为准
+def _validate_batch(raw_records: List[Tuple[int, Union[dict, str]]], errors: List[dict]) -> Dict[str, Tuple[int, CatalogRecord]]:
+    records: Dict[str, Tuple[int, CatalogRecord]] = {}
+    for line_number, raw in raw_records:
+        if isinstance(raw, str):
+            errors.append({"line": line_number, "error": raw})
+            continue
+        try:
+            record = CatalogRecord.parse_obj(raw)
+        except ValidationError as e:
+            errors.append({"line": line_number, "error": "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            )})
+            continue
+        records.pop(record.english_name, None)
+        records[record.english_name] = (line_number, record)
+    return records
+
+
+# 中文名同样唯一：中文名已被其他英文名的学校使用的记录无法写入，作为错误返回
+def _reject_name_conflicts(db: Session, records: Dict[str, Tuple[int, CatalogRecord]], errors: List[dict]):
+    owners = dict(db.execute(
+        select(School.chinese_name, School.english_name)
+        .where(School.chinese_name.in_([record.chinese_name for _, record in records.values()]))
+    ).all())
+    for english_name, (line_number, record) in list(records.items()):
+        owner = owners.setdefault(record.chinese_name, english_name)
+        if owner != english_name:
+            errors.append({"line": line_number, "error": f"中文名“{record.chinese_name}”已被学校“{owner}”使用"})
+            del records[english_name]
+
+
+def _upsert_statement(fields: Tuple[str, ...]):
+    statement = sqlite_insert(School.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=[School.english_name],
+        set_={field: statement.excluded[field] for field in fields + ("updated_at",) if field != "english_name"}
+    )
+
+
+# 按英文名批量插入或更新一批学校及其专业排名，返回新增和更新的学校数
+# 每行只更新记录中提供的字段，字段组合相同的行合并为一次executemany
+def upsert_batch(db: Session, records: Dict[str, Tuple[int, CatalogRecord]], errors: List[dict]) -> Dict[str, int]:
+    _reject_name_conflicts(db, records, errors)
+    if not records:
+        return {"inserted": 0, "updated": 0}
+    existing = set(db.execute(select(School.english_name).where(School.english_name.in_(list(records)))).scalars())
+
+    now = get_local_time()
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for _, record in records.values():
+        values = record.dict(include=set(CATALOG_FIELDS), exclude_unset=True)
+        groups.setdefault(tuple(sorted(values)), []).append({**TEXT_DEFAULTS, **values, "created_at": now, "updated_at": now})
+    for fields, rows in groups.items():
+        db.execute(_upsert_statement(fields), rows)
+
+    school_ids = dict(db.execute(
+        select(School.english_name, School.id).where(School.english_name.in_(list(records)))
+    ).all())
+    majors = {}
+    for english_name, (_, record) in records.items():
+        pairs = record.major_pairs()
+        if pairs is not None:
+            majors[school_ids[english_name]] = pairs
+    sync_majors(db, majors, sync_index=False)
+    # 学校的插入和更新同样不经过ORM事件，本批学校统一重新索引一次
+    sync_schools(db, school_ids.values())
+    mark_catalog_changed(db)
+    return {"inserted": len(records) - len(existing), "updated": len(existing)}
+
+
+def import_catalog(db: Session, lines: Iterable[str], file_format: str, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """流式导入学校目录：按批校验记录，按英文名批量写入学校和专业排名，每批单独提交；返回导入统计和错误行"""
+    result = {"inserted": 0, "updated": 0, "error_count": 0, "errors": []}
+    for raw_records in _batches(read_records(lines, file_format), batch_size):
+        errors: List[dict] = []
+        records = _validate_batch(raw_records, errors)
+        try:
+            counts = upsert_batch(db, records, errors)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        result["inserted"] += counts["inserted"]
+        result["updated"] += counts["updated"]
+        result["error_count"] += len(errors)
+        result["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(result["errors"])])
+    return result
+
+
+# 按ID顺序分批读取学校和专业排名，返回与导入格式一致的记录
+def iter_catalog(db: Session) -> Iterator[dict]:
+    result = db.execute(
+        select(School.id, *[getattr(School, field) for field in CATALOG_FIELDS])
+        .order_by(School.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    for rows in result.partitions():
+        majors: Dict[int, List[dict]] = {}
+        for school_id, major_name, major_rank in db.execute(
+            select(SchoolMajor.school_id, SchoolMajor.major_name, SchoolMajor.major_rank)
+            .where(SchoolMajor.school_id.in_([row.id for row in rows]))
+            .order_by(SchoolMajor.id)
+        ):
+            majors.setdefault(school_id, []).append({"name": major_name, "rank": major_rank})
+        for row in rows:
+            record = {field: getattr(row, field) for field in CATALOG_FIELDS}
+            record["majors"] = majors.get(row.id, [])
+            yield record
+
+
+def export_lines(records: Iterable[dict], file_format: str) -> Iterator[str]:
+    """将学校记录逐行序列化为JSON Lines或CSV（CSV的专业排名使用“专业名称：排名；…”格式）"""
+    if file_format == "jsonl":
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        majors = "；".join(f"{major['name']}：{major['rank']}" for major in record["majors"])
+        writer.writerow([record[field] if record[field] is not None else "" for field in CATALOG_FIELDS] + [majors])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m utils.catalog_io", description="学校目录批量导入导出")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="从CSV或JSON Lines文件导入学校目录")
+    import_parser.add_argument("path", help="导入文件路径，- 表示标准输入")
+    import_parser.add_argument("--format", choices=CATALOG_FORMATS, help="文件格式，默认按扩展名判断")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="每批写入并提交的行数")
+    export_parser = commands.add_parser("export", help="导出学校目录到CSV或JSON Lines文件")
+    export_parser.add_argument("path", help="导出文件路径，- 表示标准输出")
+    export_parser.add_argument("--format", choices=CATALOG_FORMATS, help="文件格式，默认按扩展名判断")
+    args = parser.parse_args()
+
+    file_format = args.format or detect_format(args.path)
+    if file_format is None:
+        parser.error("无法从文件名判断格式，请指定 --format")
+
+    with SessionLocal() as db:
+        if args.command == "import":
+            if args.path == "-":
+                result = import_catalog(db, sys.stdin, file_format, args.batch_size)
+            else:
+                with open(args.path, encoding="utf-8-sig", newline="") as source:
+                    result = import_catalog(db, source, file_format, args.batch_size)
+            for error in result["errors"]:
+                print(f"第 {error['line']} 行: {error['error']}", file=sys.stderr)
+            print(f"导入完成：新增 {result['inserted']}，更新 {result['updated']}，错误 {result['error_count']}")
+            sys.exit(1 if result["error_count"] else 0)
+        else:
+            if args.path == "-":
+                sys.stdout.writelines(export_lines(iter_catalog(db), file_format))
+            else:
+                with open(args.path, "w", encoding="utf-8", newline="") as target:
+                    target.writelines(export_lines(iter_catalog(db), file_format))
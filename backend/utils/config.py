@@ -15,6 +15,38 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 24小时
     
+    # 学校目录缓存配置
+    catalog_cache_size: int = 2048
+    catalog_cache_ttl: int = 300  # 秒
+    
+    # 认证用户缓存配置
+    principal_cache_size: int = 10000
+    principal_cache_ttl: int = 60  # 秒
+    
+    # 密码哈希配置
+    password_hash_profile: str = "default"  # 迭代次数档位：fast / default / strong
+    password_hash_rounds: Optional[int] = None  # 指定后覆盖档位中的 pbkdf2_sha256 迭代次数
+    password_hash_workers: int = 4  # 同时进行的哈希计算上限
+    
+    # 数据库连接池配置（同步和异步引擎各一个连接池）
+    db_pool_size: int = 5  # 常驻连接数
+    db_max_overflow: int = 10  # 连接池满时允许额外创建的连接数
+    db_pool_timeout: float = 30  # 等待可用连接的超时时间（秒）
+    db_pool_recycle: int = 1800  # 连接最长使用时间（秒），-1 为不回收
+    db_pool_pre_ping: bool = True  # 取出连接前检测连接是否可用
+    
+    # 录取预测模型文件目录，每次训练生成一个新版本
+    admission_model_dir: str = "./artifacts/admission"
+    admission_model_check_interval: float = 60  # 检查模型目录中是否有新版本的间隔（秒）
+    
+    # SQLite 连接参数（PRAGMA），每个新连接建立时设置
+    sqlite_journal_mode: str = "WAL"  # WAL模式下读写互不阻塞
+    sqlite_synchronous: str = "NORMAL"  # WAL模式下NORMAL即可保证数据库一致性
+    sqlite_mmap_size: int = 268435456  # 内存映射大小（字节），256MB
+    sqlite_cache_size: int = -65536  # 页缓存大小，负数单位为KB，即64MB
+    sqlite_busy_timeout: int = 5000  # 数据库被锁时的等待时间（毫秒）
+    sqlite_temp_store: str = "MEMORY"  # 临时表和索引存放在内存中
+    
 
     
     class Config:
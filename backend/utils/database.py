@@ -1,17 +1,196 @@
-from sqlalchemy import create_engine
+import threading
+import weakref
+from typing import Dict, Optional, Union
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"}
+}
+
+
+# 根据配置生成SQLite连接参数
+def sqlite_pragmas() -> Dict[str, Union[str, int]]:
+    return {
+        "foreign_keys": "ON",
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "busy_timeout": settings.sqlite_busy_timeout,
+        "temp_store": settings.sqlite_temp_store
+    }
+
+
+def _pragma_statements(pragmas: Dict[str, Union[str, int]]):
+    statements = []
+    for name, value in pragmas.items():
+        if name in _PRAGMA_CHOICES:
+            value = str(value).upper()
+            if value not in _PRAGMA_CHOICES[name]:
+                raise ValueError(f"无效的SQLite参数: {name}={value}")
+        elif name != "foreign_keys":
+            value = int(value)
+        statements.append(f"PRAGMA {name}={value}")
+    return statements
+
+
+def _listen_sqlite_pragmas(engine: Engine, pragmas: Optional[Dict[str, Union[str, int]]]):
+    statements = _pragma_statements(sqlite_pragmas() if pragmas is None else pragmas)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def _is_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_memory_database(url: URL) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+class _WaitTrackingPool:
+    """取出连接前检查连接池是否已满，记录需要等待其他请求归还连接的次数和等待超时次数"""
+
+    _usage = None
+
+    def connect(self):
+        usage = self._usage
+        if usage is None:
+            return super().connect()
+        counters, lock = usage
+        if self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow:
+            with lock:
+                counters["waits"] += 1
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with lock:
+                counters["timeouts"] += 1
+            raise
+
+    def recreate(self):
+        # engine.dispose() 会重建连接池，统计计数沿用到新的连接池
+        pool = super().recreate()
+        pool._usage = self._usage
+        return pool
+
+
+class TrackedQueuePool(_WaitTrackingPool, QueuePool):
+    pass
+
+
+class TrackedAsyncAdaptedQueuePool(_WaitTrackingPool, AsyncAdaptedQueuePool):
+    pass
+
+
+# 连接池参数；内存数据库只能使用单连接池，不应用这些参数
+def _pool_options(url: URL, pool_class) -> dict:
+    if _is_memory_database(url):
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping
+    }
+
+
+# 创建数据库引擎，SQLite连接建立时设置外键约束、WAL等参数
+# pragmas 为None时使用配置中的参数，其他参数会覆盖连接池配置
+def create_database_engine(url: Optional[str] = None, pragmas: Optional[Dict[str, Union[str, int]]] = None, **kwargs) -> Engine:
+    url = make_url(url or settings.database_url)
+    kwargs = {**_pool_options(url, TrackedQueuePool), **kwargs}
+    if _is_sqlite(url):
+        kwargs.setdefault("connect_args", {"check_same_thread": False})  # SQLite特定配置
+    engine = create_engine(url, **kwargs)
+    if _is_sqlite(url):
+        _listen_sqlite_pragmas(engine, pragmas)
+    _track_pool_usage(engine)
+    return engine
+
+
+# 创建异步数据库引擎，SQLite使用aiosqlite驱动，不占用线程池
+# aiosqlite 默认不复用连接，这里同样使用连接池，避免每个请求重新连接并设置参数
+def create_async_database_engine(url: Optional[str] = None, pragmas: Optional[Dict[str, Union[str, int]]] = None, **kwargs) -> AsyncEngine:
+    url = make_url(url or settings.database_url)
+    if _is_sqlite(url) and url.get_driver_name() != "aiosqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    kwargs = {**_pool_options(url, TrackedAsyncAdaptedQueuePool), **kwargs}
+    engine = create_async_engine(url, **kwargs)
+    if _is_sqlite(url):
+        _listen_sqlite_pragmas(engine.sync_engine, pragmas)
+    _track_pool_usage(engine.sync_engine)
+    return engine
+
+
+# 各引擎的连接池使用情况
+_pool_usage: "weakref.WeakKeyDictionary[Engine, tuple]" = weakref.WeakKeyDictionary()
+
+
+# 记录连接池使用情况：取出次数、同时取出连接数峰值、等待次数和等待超时次数
+# 等待次数为取出时连接池已满、需要等待其他请求归还连接的次数
+def _track_pool_usage(engine: Engine):
+    usage = {"checkouts": 0, "peak_checked_out": 0, "waits": 0, "timeouts": 0}
+    lock = threading.Lock()
+    _pool_usage[engine] = (usage, lock)
+    if isinstance(engine.pool, _WaitTrackingPool):
+        engine.pool._usage = (usage, lock)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool = engine.pool
+        with lock:
+            usage["checkouts"] += 1
+            if isinstance(pool, QueuePool):
+                usage["peak_checked_out"] = max(usage["peak_checked_out"], pool.checkedout())
+
+
+def pool_stats(engine: Engine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow()
+        })
+    usage, lock = _pool_usage.get(engine, ({}, threading.Lock()))
+    with lock:
+        stats.update(usage)
+    return stats
+
+
 # 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}  # SQLite特定配置
-)
+engine = create_database_engine()
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步数据库引擎
+async_engine = create_async_database_engine()
+
+# 创建异步会话工厂，提交后不使对象过期，避免在事件循环外隐式加载属性
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # 依赖函数，用于获取数据库会话
 def get_db():
     db = SessionLocal()
@@ -20,7 +199,17 @@ def get_db():
     finally:
         db.close()
 
-# 创建所有表
-def create_tables():
-    from models.database import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# 依赖函数，用于在异步接口中获取数据库会话
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# 初始化数据库：执行未完成的迁移，返回当前数据库版本
+def init_database() -> int:
+    from .migrations import migrate
+    from .search import check_search_index
+    version = migrate(engine)
+    # 全文检索表由迁移创建，启动时检查是否可用并与学校数据同步
+    with engine.begin() as connection:
+        check_search_index(connection)
+    return version
\ No newline at end of file
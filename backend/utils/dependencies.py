@@ -1,9 +1,13 @@
 from fastapi import Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
 from typing import Optional
 
-from .database import get_db
+from .cache import principal_cache
+from .database import get_async_db, get_db
 from .security import decode_token
 from models.database import User, UserRole
 
@@ -11,9 +15,49 @@ from models.database import User, UserRole
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+def _cache_principal(user: User, generation: int):
+    principal = User(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    )
+    make_transient_to_detached(principal)
+    principal_cache.set(user.username, principal, generation)
 
-# 获取当前用户
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+
+# 按用户名查找用户，优先使用认证用户缓存
+# 缓存中保存不含密码的游离副本，命中时合并到当前会话而不查询数据库
+def _load_principal(db: Session, username: str) -> Optional[User]:
+    cached = principal_cache.get(username)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    generation = principal_cache.generation
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    _cache_principal(user, generation)
+    return user
+
+
+async def _load_principal_async(db: AsyncSession, username: str) -> Optional[User]:
+    cached = principal_cache.get(username)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    generation = principal_cache.generation
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if user is None:
+        return None
+    _cache_principal(user, generation)
+    return user
+
+
+# 从访问令牌中读取用户名，令牌无效时抛出401
+def _access_token_username(token: str) -> str:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无法验证凭据",
@@ -31,13 +75,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
+    return username
+
+
+def _require_user(user: Optional[User]) -> User:
     if user is None:
-        raise credentials_exception
-    
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无法验证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
+
+# 获取当前用户
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    return _require_user(_load_principal(db, _access_token_username(token)))
+
+# 获取当前用户，供使用异步数据库会话的接口使用，查询用户时不占用线程池
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    return _require_user(await _load_principal_async(db, _access_token_username(token)))
+
 # 验证留学生角色
 def get_current_student(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.STUDENT:
@@ -47,6 +105,10 @@ def get_current_student(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
+# 验证留学生角色（异步接口）
+async def get_current_student_async(current_user: User = Depends(get_current_user_async)) -> User:
+    return get_current_student(current_user)
+
 # 验证教师角色
 def get_current_teacher(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.TEACHER:
@@ -76,7 +138,7 @@ def get_current_user_from_refresh(token: str = Depends(oauth2_scheme), db: Sessi
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = _load_principal(db, username)
     if user is None:
         raise credentials_exception
     
@@ -0,0 +1,360 @@
+import logging
+import re
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Set
+
+import numpy as np
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# 记录已执行迁移的版本表
+SCHEMA_VERSION_TABLE = "schema_migrations"
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+class MigrationDeferred(Exception):
+    """迁移依赖的数据库功能当前不可用（如SQLite未编译FTS5），本次不记录版本，下次执行迁移时重试"""
+
+
+# 注册迁移，版本号必须递增
+# 迁移中的建表语句和数据处理均按编写时的结构固定写出，不引用当前模型，之后修改模型时须新增迁移
+def migration(version: int, description: str):
+    def decorator(upgrade: Callable[[Connection], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"迁移版本号必须递增: {version}")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+    return decorator
+
+
+def _execute_all(connection: Connection, statements: List[str]):
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def applied_versions(connection: Connection) -> Set[int]:
+    if not inspect(connection).has_table(SCHEMA_VERSION_TABLE):
+        return set()
+    return set(connection.execute(text(f"SELECT version FROM {SCHEMA_VERSION_TABLE}")).scalars())
+
+
+def current_version(connection: Connection) -> int:
+    return max(applied_versions(connection), default=0)
+
+
+def migrate(engine: Engine) -> int:
+    """执行所有未执行的迁移，返回当前版本；所有迁移均已执行时只查询一次版本表
+
+    暂时无法执行的迁移（抛出 MigrationDeferred）不记录版本，之后的迁移照常执行，下次调用时重试
+    """
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    pending = [item for item in MIGRATIONS if item.version not in applied]
+    if not pending:
+        return max(applied, default=0)
+
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL, applied_at DATETIME NOT NULL)"
+        ))
+
+    # 每个迁移在单独的事务中执行，失败时已完成的迁移不会回滚
+    for item in pending:
+        logger.info("执行数据库迁移 %s: %s", item.version, item.description)
+        try:
+            with engine.begin() as connection:
+                item.upgrade(connection)
+                connection.execute(
+                    text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                    {"version": item.version, "description": item.description, "applied_at": datetime.now()}
+                )
+        except MigrationDeferred as e:
+            logger.warning("数据库迁移 %s 暂不执行: %s", item.version, e)
+            continue
+        applied.add(item.version)
+    return max(applied, default=0)
+
+
+@migration(1, "创建数据表")
+def _create_tables(connection: Connection):
+    # 迁移机制引入前已有的数据库中这些表已存在，均使用 IF NOT EXISTS
+    _execute_all(connection, [
+        """CREATE TABLE IF NOT EXISTS users (
+            id INTEGER NOT NULL,
+            username VARCHAR(50) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(7) NOT NULL,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+        "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+        """CREATE TABLE IF NOT EXISTS schools (
+            id INTEGER NOT NULL,
+            chinese_name VARCHAR(100) NOT NULL,
+            english_name VARCHAR(200) NOT NULL,
+            location VARCHAR(100),
+            ranking INTEGER,
+            introduction TEXT,
+            details TEXT,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT check_valid_school_rank CHECK (ranking > 0),
+            UNIQUE (chinese_name),
+            UNIQUE (english_name)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_schools_id ON schools (id)",
+        """CREATE TABLE IF NOT EXISTS success_cases (
+            id INTEGER NOT NULL,
+            title VARCHAR(200) NOT NULL,
+            content TEXT NOT NULL,
+            file_path VARCHAR(255),
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_success_cases_id ON success_cases (id)",
+        """CREATE TABLE IF NOT EXISTS student_profiles (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            name VARCHAR(50) NOT NULL,
+            gender VARCHAR(10),
+            age INTEGER,
+            toefl FLOAT,
+            gre FLOAT,
+            gpa FLOAT,
+            target_region VARCHAR(100),
+            email VARCHAR(100),
+            phone VARCHAR(20),
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT check_valid_age CHECK (age >= 18 AND age <= 100),
+            CONSTRAINT check_valid_toefl CHECK (toefl >= 0 AND toefl <= 120),
+            CONSTRAINT check_valid_gre CHECK (gre >= 260 AND gre <= 340),
+            CONSTRAINT check_valid_gpa CHECK (gpa >= 0 AND gpa <= 4.0),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_student_profiles_id ON student_profiles (id)",
+        """CREATE TABLE IF NOT EXISTS teacher_profiles (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            name VARCHAR(50) NOT NULL,
+            email VARCHAR(100),
+            phone VARCHAR(20),
+            subject VARCHAR(100),
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_teacher_profiles_id ON teacher_profiles (id)",
+        """CREATE TABLE IF NOT EXISTS school_majors (
+            id INTEGER NOT NULL,
+            school_id INTEGER NOT NULL,
+            major_name VARCHAR(100) NOT NULL,
+            major_rank INTEGER,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT check_valid_major_rank CHECK (major_rank > 0),
+            FOREIGN KEY(school_id) REFERENCES schools (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_school_majors_id ON school_majors (id)",
+        """CREATE TABLE IF NOT EXISTS training_reservations (
+            id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            teacher_id INTEGER,
+            total_hours INTEGER NOT NULL,
+            training_type VARCHAR(50),
+            notes TEXT,
+            status VARCHAR(9),
+            attended_hours INTEGER,
+            feedback TEXT,
+            homework TEXT,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT check_valid_total_hours CHECK (total_hours > 0),
+            CONSTRAINT check_valid_attended_hours CHECK (attended_hours >= 0),
+            FOREIGN KEY(student_id) REFERENCES users (id),
+            FOREIGN KEY(teacher_id) REFERENCES users (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_training_reservations_id ON training_reservations (id)",
+        """CREATE TABLE IF NOT EXISTS document_reservations (
+            id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            teacher_id INTEGER NOT NULL,
+            document_count INTEGER NOT NULL,
+            document_type VARCHAR(50),
+            target_school VARCHAR(200),
+            notes TEXT,
+            comments TEXT,
+            status VARCHAR(9),
+            progress INTEGER,
+            original_content TEXT,
+            revised_content TEXT,
+            file_path VARCHAR(255),
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT check_valid_document_count CHECK (document_count > 0),
+            CONSTRAINT check_valid_progress CHECK (progress >= 0 AND progress <= 100),
+            FOREIGN KEY(student_id) REFERENCES users (id),
+            FOREIGN KEY(teacher_id) REFERENCES users (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_document_reservations_id ON document_reservations (id)",
+    ])
+
+
+@migration(2, "为预约、个人信息和学校专业外键添加索引")
+def _add_foreign_key_indexes(connection: Connection):
+    _execute_all(connection, [
+        "CREATE INDEX IF NOT EXISTS ix_student_profiles_user_id ON student_profiles (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_teacher_profiles_user_id ON teacher_profiles (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_school_majors_school_id ON school_majors (school_id)",
+        "CREATE INDEX IF NOT EXISTS ix_training_reservations_student_created ON training_reservations (student_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_training_reservations_teacher_status_created ON training_reservations (teacher_id, status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_document_reservations_student_created ON document_reservations (student_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_document_reservations_teacher_status_created ON document_reservations (teacher_id, status, created_at)",
+    ])
+
+
+# 迁移3时的成绩直方图细分组：(最小值, 最大值, 分组数)
+_V3_SCORE_BINS = {"toefl": (0, 120, 120), "gre": (260, 340, 80), "gpa": (0, 4.0, 40)}
+
+
+@migration(3, "创建学生统计汇总表")
+def _create_student_statistics(connection: Connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS student_statistics ("
+        "name VARCHAR(50) NOT NULL, value FLOAT NOT NULL, PRIMARY KEY (name))"
+    ))
+
+    # 按现有学生信息计算初始汇总：人数、性别人数、成绩总和与人数（空值和0不计入）及直方图分组计数
+    columns = list(_V3_SCORE_BINS)
+    row = connection.execute(text(
+        "SELECT count(id) AS total_count, "
+        "sum(CASE WHEN gender = '男' THEN 1 ELSE 0 END) AS male_count, "
+        "sum(CASE WHEN gender = '女' THEN 1 ELSE 0 END) AS female_count, "
+        + ", ".join(f"sum(nullif({c}, 0)) AS {c}_sum, count(nullif({c}, 0)) AS {c}_count" for c in columns)
+        + " FROM student_profiles"
+    )).one()
+    counters = {key: float(value or 0) for key, value in row._mapping.items()}
+    for column, (low, high, bins) in _V3_SCORE_BINS.items():
+        values = np.fromiter(
+            connection.execute(text(f"SELECT {column} FROM student_profiles WHERE {column} > 0")).scalars(), dtype=float
+        )
+        histogram, _ = np.histogram(values, bins=np.linspace(low, high, bins + 1))
+        for index, count in enumerate(histogram):
+            counters[f"{column}_bin_{index}"] = float(count)
+
+    connection.execute(text("DELETE FROM student_statistics"))
+    connection.execute(
+        text("INSERT INTO student_statistics (name, value) VALUES (:name, :value)"),
+        [{"name": name, "value": value} for name, value in counters.items()]
+    )
+
+
+@migration(4, "创建留学申请记录表")
+def _create_applications(connection: Connection):
+    _execute_all(connection, [
+        """CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            school_id INTEGER NOT NULL,
+            major_name VARCHAR(100),
+            toefl FLOAT,
+            gre FLOAT,
+            gpa FLOAT,
+            status VARCHAR(8) NOT NULL,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(student_id) REFERENCES users (id),
+            FOREIGN KEY(school_id) REFERENCES schools (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_applications_id ON applications (id)",
+        "CREATE INDEX IF NOT EXISTS ix_applications_student_id ON applications (student_id)",
+        "CREATE INDEX IF NOT EXISTS ix_applications_school_id ON applications (school_id)",
+    ])
+
+
+# 迁移5时的检索分词：中文按二元组切分并在每段末尾保留单字，其他文字按词切分
+_V5_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_V5_TOKEN_PATTERN = re.compile(rf"[{_V5_CJK}]+|[^\W{_V5_CJK}]+")
+_V5_CJK_RUN = re.compile(rf"[{_V5_CJK}]+")
+
+
+def _v5_tokenize(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    tokens = []
+    for match in _V5_TOKEN_PATTERN.finditer(value.lower()):
+        word = match.group()
+        if _V5_CJK_RUN.fullmatch(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            tokens.append(word[-1])
+        else:
+            tokens.append(word)
+    return " ".join(tokens)
+
+
+@migration(5, "创建学校全文检索表")
+def _create_school_search(connection: Connection):
+    # SQLite未编译FTS5时不记录此迁移，学校搜索使用LIKE查询，升级SQLite后再次启动时创建
+    try:
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS school_search USING fts5("
+            "chinese_name, english_name, location, introduction, majors, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    except OperationalError as e:
+        raise MigrationDeferred("SQLite 不支持 FTS5，暂不创建学校全文检索表") from e
+
+    # 从现有学校数据建立索引，rowid 与 schools.id 一致，majors 为该校所有专业名称
+    connection.execute(text("DELETE FROM school_search"))
+    rows = connection.execute(text(
+        "SELECT s.id, s.chinese_name, s.english_name, s.location, s.introduction, "
+        "(SELECT group_concat(m.major_name, ' ') FROM school_majors m WHERE m.school_id = s.id) "
+        "FROM schools s"
+    )).fetchall()
+    if rows:
+        connection.execute(
+            text(
+                "INSERT INTO school_search (rowid, chinese_name, english_name, location, introduction, majors) "
+                "VALUES (:rowid, :chinese_name, :english_name, :location, :introduction, :majors)"
+            ),
+            [
+                {
+                    "rowid": row[0], "chinese_name": _v5_tokenize(row[1]), "english_name": _v5_tokenize(row[2]),
+                    "location": _v5_tokenize(row[3]), "introduction": _v5_tokenize(row[4]), "majors": _v5_tokenize(row[5])
+                }
+                for row in rows
+            ]
+        )
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"数据库当前版本: {migrate(engine)}")
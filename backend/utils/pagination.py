@@ -0,0 +1,59 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+from fastapi import HTTPException, status
+
+# 近似总数缓存的有效期（秒）和最大条目数
+APPROXIMATE_COUNT_TTL = 60
+APPROXIMATE_COUNT_MAX_ENTRIES = 256
+
+_count_cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+_count_lock = threading.Lock()
+
+
+# 将排序键编码为不透明游标
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+# 解析游标，空游标表示第一页；排序键均为整数（ID、排名），其他类型的值视为无效游标
+def decode_cursor(cursor: Optional[str], length: int) -> Optional[List[Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+    if (
+        not isinstance(values, list) or len(values) != length
+        or not all(isinstance(value, int) and not isinstance(value, bool) for value in values)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+    return values
+
+
+# 获取近似总数，结果在有效期内复用，避免每次翻页都执行COUNT
+def approximate_count(key: Hashable, count: Callable[[], int]) -> int:
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            _count_cache.move_to_end(key)
+            return cached[0]
+
+    total = count()
+    with _count_lock:
+        _count_cache[key] = (total, now + APPROXIMATE_COUNT_TTL)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > APPROXIMATE_COUNT_MAX_ENTRIES:
+            _count_cache.popitem(last=False)
+    return total
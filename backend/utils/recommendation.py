@@ -0,0 +1,122 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.database import School
+from .cache import on_catalog_change
+
+# 推荐系数阈值，低于该值的学校不推荐
+MIN_RECOMMENDATION_SCORE = 60
+
+# 托福30%+GRE30%+GPA40%
+TOEFL_WEIGHT = 0.3
+GRE_WEIGHT = 0.3
+GPA_WEIGHT = 0.4
+
+
+class SchoolRequirementSnapshot:
+    """学校录取要求的列式快照，每列按学校ID升序排列"""
+
+    def __init__(self, ids: np.ndarray, rankings: np.ndarray, locations: List[str]):
+        self.ids = ids
+        self.rankings = rankings
+        self.locations = [(location or "").lower() for location in locations]
+
+        # 基于学校排名反推录取要求，无排名的学校使用默认要求
+        has_ranking = ~np.isnan(rankings)
+        self.toefl_requirement = np.where(has_ranking, 110 - (rankings * 0.2), 90)
+        self.gre_requirement = np.where(has_ranking, 330 - (rankings * 0.1), 300)
+        self.gpa_requirement = np.where(has_ranking, 3.8 - (rankings * 0.002), 3.5)
+
+        self._region_masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def region_mask(self, region: Optional[str]) -> Optional[np.ndarray]:
+        """返回所在地包含指定地区的学校掩码，与 School.location.contains 语义一致"""
+        if not region:
+            return None
+        key = region.lower()
+        mask = self._region_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((key in location for location in self.locations), dtype=bool, count=len(self.locations))
+            with self._lock:
+                self._region_masks[key] = mask
+        return mask
+
+    def score_matrix(self, toefl: Sequence[float], gre: Sequence[float], gpa: Sequence[float]) -> np.ndarray:
+        """一次性计算 学生 × 学校 的推荐系数矩阵"""
+        toefl = np.asarray(toefl, dtype=float)[:, None]
+        gre = np.asarray(gre, dtype=float)[:, None]
+        gpa = np.asarray(gpa, dtype=float)[:, None]
+
+        # 排名过低时要求可能为0，按满分处理而不是抛出除零错误
+        with np.errstate(divide="ignore", invalid="ignore"):
+            toefl_score = np.minimum(toefl / self.toefl_requirement * 100, 100)
+            gre_score = np.minimum(gre / self.gre_requirement * 100, 100)
+            gpa_score = np.minimum(gpa / self.gpa_requirement * 100, 100)
+
+        return toefl_score * TOEFL_WEIGHT + gre_score * GRE_WEIGHT + gpa_score * GPA_WEIGHT
+
+
+def top_k(scores: np.ndarray, mask: Optional[np.ndarray] = None, k: Optional[int] = None) -> np.ndarray:
+    """返回达到推荐阈值的学校下标，按推荐系数降序；k为空时返回全部"""
+    rounded = np.round(scores, 2)
+    eligible = rounded >= MIN_RECOMMENDATION_SCORE
+    if mask is not None:
+        eligible &= mask
+    candidates = np.flatnonzero(eligible)
+
+    # 只对前k个候选排序，避免全量排序
+    if k is not None and k < len(candidates):
+        partitioned = np.argpartition(-rounded[candidates], k - 1)[:k]
+        candidates = candidates[partitioned]
+
+    # 分数相同时保持学校原有顺序
+    order = np.lexsort((candidates, -rounded[candidates]))
+    return candidates[order]
+
+
+class RecommendationEngine:
+    """学校推荐引擎，缓存学校要求快照，学校数据变更后自动重建"""
+
+    def __init__(self):
+        self._snapshot: Optional[SchoolRequirementSnapshot] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._version += 1
+        self._snapshot = None
+
+    def snapshot(self, db: Session) -> SchoolRequirementSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None:
+                version = self._version
+                # 只读取计算所需的列，跳过介绍和详情等大文本字段
+                rows = db.query(School.id, School.ranking, School.location).order_by(School.id).all()
+                ids = np.array([row.id for row in rows], dtype=np.int64)
+                rankings = np.array(
+                    [row.ranking if row.ranking else np.nan for row in rows], dtype=float
+                )
+                snapshot = SchoolRequirementSnapshot(ids, rankings, [row.location for row in rows])
+                # 构建期间学校数据发生变更时不缓存，避免保存过期快照
+                if version == self._version:
+                    self._snapshot = snapshot
+                return snapshot
+            return self._snapshot
+
+
+recommendation_engine = RecommendationEngine()
+
+
+# 学校数据提交后使快照失效，下次请求时重建
+on_catalog_change(recommendation_engine.invalidate)
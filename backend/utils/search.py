@@ -0,0 +1,147 @@
+import logging
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from models.database import School, SchoolMajor
+
+logger = logging.getLogger(__name__)
+
+# 学校全文检索表，rowid 与 schools.id 一致
+SEARCH_TABLE = "school_search"
+
+# 参与检索的列，majors 为该校所有专业名称
+SEARCH_COLUMNS = ("chinese_name", "english_name", "location", "introduction", "majors")
+
+# 当前数据库是否已启用全文检索，由 check_search_index 在启动时设置
+_search_enabled = False
+
+_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_CJK_RUN = re.compile(rf"[{_CJK}]+")
+
+
+# 中文按二元组切分（如 "哈佛大学" -> "哈佛 佛大 大学 学"），其他文字按词切分
+# 每段中文末尾保留单字，使单字查询也能通过前缀匹配命中
+def tokenize(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(value.lower()):
+        word = match.group()
+        if _CJK_RUN.fullmatch(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            tokens.append(word[-1])
+        else:
+            tokens.append(word)
+    return " ".join(tokens)
+
+
+# 将搜索关键词转换为FTS5短语查询，多个关键词之间为AND关系
+def build_match_query(keyword: str, columns: Optional[Iterable[str]] = None) -> Optional[str]:
+    phrases = []
+    for match in _TOKEN_PATTERN.finditer(keyword.lower()):
+        word = match.group()
+        if _CJK_RUN.fullmatch(word) and len(word) > 1:
+            phrases.append('"' + " ".join(word[i:i + 2] for i in range(len(word) - 1)) + '"')
+        else:
+            # 单个汉字或英文词使用前缀匹配
+            phrases.append(f'"{word}"*')
+    if not phrases:
+        return None
+    query = " AND ".join(phrases)
+    if columns:
+        query = "{" + " ".join(columns) + "} : (" + query + ")"
+    return query
+
+
+def check_search_index(connection) -> bool:
+    """检查学校全文检索表（由数据库迁移创建）是否可用，索引与学校数据条数不一致时从现有数据重建；不可用时返回False"""
+    global _search_enabled
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+    ).first() is not None
+    if not exists:
+        logger.warning("学校全文检索表不存在（SQLite 不支持 FTS5），学校搜索将使用 LIKE 查询")
+        _search_enabled = False
+        return False
+
+    indexed = connection.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+    total = connection.execute(text("SELECT count(*) FROM schools")).scalar()
+    if indexed != total:
+        rebuild_search_index(connection)
+    _search_enabled = True
+    return True
+
+
+def rebuild_search_index(connection):
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    ids = [row[0] for row in connection.execute(text("SELECT id FROM schools"))]
+    reindex_schools(connection, ids)
+
+
+# 重新索引指定学校，已删除的学校只会从索引中移除
+def reindex_schools(connection, school_ids: Iterable[int]):
+    school_ids = sorted(set(school_ids))
+    if not school_ids:
+        return
+    placeholders = ", ".join(f":id{i}" for i in range(len(school_ids)))
+    params = {f"id{i}": school_id for i, school_id in enumerate(school_ids)}
+
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})"), params)
+    rows = connection.execute(text(
+        "SELECT s.id, s.chinese_name, s.english_name, s.location, s.introduction, "
+        "(SELECT group_concat(m.major_name, ' ') FROM school_majors m WHERE m.school_id = s.id) "
+        f"FROM schools s WHERE s.id IN ({placeholders})"
+    ), params).fetchall()
+    if rows:
+        connection.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, " + ", ".join(SEARCH_COLUMNS) + ") "
+                "VALUES (:rowid, " + ", ".join(f":{c}" for c in SEARCH_COLUMNS) + ")"
+            ),
+            [
+                {"rowid": row[0], **{c: tokenize(v) for c, v in zip(SEARCH_COLUMNS, row[1:])}}
+                for row in rows
+            ]
+        )
+
+
+# 按相关度排序返回匹配的学校ID
+def search_school_ids(db: Session, match_query: str, limit: Optional[int] = None) -> List[int]:
+    sql = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query ORDER BY bm25({SEARCH_TABLE})"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return [row[0] for row in db.execute(text(sql), {"query": match_query})]
+
+
+def search_index_available() -> bool:
+    return _search_enabled
+
+
+# 立即在当前事务中重新索引指定学校，用于绕过ORM的批量更新/删除
+def sync_schools(session: Session, school_ids: Iterable[int]):
+    if _search_enabled:
+        reindex_schools(session.connection(), school_ids)
+
+
+# 在同一事务中同步索引：flush时记录变更的学校，flush完成后重新索引
+@event.listens_for(Session, "after_flush")
+def _track_search_changes(session, flush_context):
+    dirty = session.info.setdefault("search_dirty", set())
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, School) and obj.id is not None:
+            dirty.add(obj.id)
+        elif isinstance(obj, SchoolMajor) and obj.school_id is not None:
+            dirty.add(obj.school_id)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _sync_search_index(session, flush_context):
+    dirty = session.info.pop("search_dirty", None)
+    if not dirty:
+        return
+    if _search_enabled:
+        reindex_schools(session.connection(), dirty)
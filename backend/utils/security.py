@@ -1,19 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
 
+# pbkdf2_sha256 迭代次数档位，可用 benchmark_kdf.py 按部署机器的目标验证耗时选取迭代次数
+PASSWORD_HASH_PROFILES = {
+    "fast": 10000,
+    "default": 29000,
+    "strong": 600000
+}
+
+
+def password_hash_rounds() -> int:
+    if settings.password_hash_rounds:
+        return settings.password_hash_rounds
+    if settings.password_hash_profile not in PASSWORD_HASH_PROFILES:
+        raise ValueError(f"未知的密码哈希档位: {settings.password_hash_profile}")
+    return PASSWORD_HASH_PROFILES[settings.password_hash_profile]
+
+
+def create_password_context(rounds: int) -> CryptContext:
+    # 迭代次数与当前配置不一致的哈希视为需要更新，登录成功时自动重新哈希
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds
+    )
+
+
 # 密码加密上下文 - 使用pbkdf2_sha256算法，避免bcrypt的72字节限制
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = create_password_context(password_hash_rounds())
+
+# 密码哈希专用线程池，限制同时进行的哈希计算数量
+# hashlib 计算 pbkdf2 时会释放GIL，哈希期间事件循环和其他请求不受影响
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
 
-# 密码验证
+# 密码验证，供同步代码使用；同样在专用线程池中计算，受同时计算数量上限约束
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _password_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
 
-# 生成密码哈希
+# 生成密码哈希，供同步代码使用
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _password_executor.submit(pwd_context.hash, password).result()
+
+# 异步接口中生成密码哈希，等待计算期间不阻塞事件循环
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_password_executor.submit(pwd_context.hash, password))
+
+# 异步接口中使用，等待哈希计算期间不阻塞事件循环
+# 返回 (是否验证通过, 新哈希)，哈希参数已过期时新哈希不为None，调用方应保存
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_password_executor.submit(pwd_context.verify_and_update, plain_password, hashed_password))
 
 # 创建访问令牌
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
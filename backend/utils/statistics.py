@@ -0,0 +1,259 @@
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import case, event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from models.database import StudentProfile, StudentStatistic
+
+# 参与统计的成绩列
+SCORE_COLUMNS = ("toefl", "gre", "gpa")
+
+# 物化直方图的细分组：(最小值, 最大值, 分组数)，与成绩取值范围一致
+SCORE_BINS = {
+    "toefl": (0, 120, 120),
+    "gre": (260, 340, 80),
+    "gpa": (0, 4.0, 40)
+}
+
+# 返回直方图时合并的细分组数，即托福、GRE每10分一组，GPA每0.5一组
+HISTOGRAM_GROUP = {"toefl": 10, "gre": 10, "gpa": 5}
+
+# 返回的成绩百分位，由细分组直方图线性插值估算
+SCORE_PERCENTILES = (10, 25, 50, 75, 90)
+
+_EDGES = {column: np.linspace(low, high, bins + 1) for column, (low, high, bins) in SCORE_BINS.items()}
+
+
+def _bin_name(column: str, index: int) -> str:
+    return f"{column}_bin_{index}"
+
+
+# 成绩所在的细分组，与 np.histogram 一致：左闭右开，最后一组包含最大值
+def _bin_index(column: str, value: float) -> Optional[int]:
+    edges = _EDGES[column]
+    if value < edges[0] or value > edges[-1]:
+        return None
+    return min(int(np.searchsorted(edges, value, side="right")) - 1, len(edges) - 2)
+
+
+# 单个学生对统计汇总的贡献；成绩为空或为0时不计入
+def profile_counters(gender: Optional[str], scores: Dict[str, Optional[float]]) -> Dict[str, float]:
+    counters = {"total_count": 1}
+    if gender == "男":
+        counters["male_count"] = 1
+    elif gender == "女":
+        counters["female_count"] = 1
+    for column in SCORE_COLUMNS:
+        value = scores.get(column)
+        if not value:
+            continue
+        counters[f"{column}_sum"] = value
+        counters[f"{column}_count"] = 1
+        index = _bin_index(column, value)
+        if index is not None:
+            counters[_bin_name(column, index)] = 1
+    return counters
+
+
+# 全量计算统计汇总：一次聚合查询统计人数和成绩总和，每种成绩读取一列计算直方图
+def compute_counters(connection) -> Dict[str, float]:
+    row = connection.execute(select(
+        func.count(StudentProfile.id).label("total_count"),
+        func.sum(case((StudentProfile.gender == "男", 1), else_=0)).label("male_count"),
+        func.sum(case((StudentProfile.gender == "女", 1), else_=0)).label("female_count"),
+        *[func.sum(func.nullif(getattr(StudentProfile, column), 0)).label(f"{column}_sum") for column in SCORE_COLUMNS],
+        *[func.count(func.nullif(getattr(StudentProfile, column), 0)).label(f"{column}_count") for column in SCORE_COLUMNS]
+    )).one()
+    counters = {key: float(value or 0) for key, value in row._mapping.items()}
+
+    for column in SCORE_COLUMNS:
+        field = getattr(StudentProfile, column)
+        values = np.fromiter(connection.execute(select(field).where(field > 0)).scalars(), dtype=float)
+        histogram, _ = np.histogram(values, bins=_EDGES[column])
+        for index, count in enumerate(histogram):
+            counters[_bin_name(column, index)] = float(count)
+    return counters
+
+
+# 全量重建统计汇总表
+def rebuild_statistics(connection):
+    counters = compute_counters(connection)
+    connection.execute(StudentStatistic.__table__.delete())
+    connection.execute(
+        StudentStatistic.__table__.insert(),
+        [{"name": name, "value": value} for name, value in counters.items()]
+    )
+
+
+# 比较统计汇总表与全量计算结果，返回不一致的项：{名称: (汇总表中的值, 实际值)}
+def check_statistics(connection) -> Dict[str, tuple]:
+    expected = compute_counters(connection)
+    stored = dict(connection.execute(select(StudentStatistic.name, StudentStatistic.value)).all())
+    return {
+        name: (stored.get(name), value)
+        for name, value in expected.items()
+        if stored.get(name) is None or not math.isclose(stored[name], value, rel_tol=1e-9, abs_tol=1e-6)
+    }
+
+
+def _apply_deltas(connection, deltas: Dict[str, float]):
+    deltas = [{"name": name, "delta": delta} for name, delta in deltas.items() if delta]
+    if deltas:
+        connection.execute(text(
+            f"INSERT INTO {StudentStatistic.__tablename__} (name, value) VALUES (:name, :delta) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value"
+        ), deltas)
+
+
+def _read_counters(db: Session) -> Dict[str, float]:
+    return dict(db.execute(select(StudentStatistic.name, StudentStatistic.value)).all())
+
+
+def _average(counters: Dict[str, float], column: str) -> float:
+    count = counters.get(f"{column}_count", 0)
+    return round(counters.get(f"{column}_sum", 0) / count, 2) if count else 0
+
+
+# 学生人数、性别人数和平均成绩，读取统计汇总表，耗时与学生人数无关
+def summary_statistics(db: Session) -> dict:
+    counters = _read_counters(db)
+    return {
+        "total_count": int(counters.get("total_count", 0)),
+        "male_count": int(counters.get("male_count", 0)),
+        "female_count": int(counters.get("female_count", 0)),
+        **{f"average_{column}": _average(counters, column) for column in SCORE_COLUMNS}
+    }
+
+
+def _estimate_percentiles(counts: np.ndarray, edges: np.ndarray) -> Dict[str, float]:
+    total = counts.sum()
+    if not total:
+        return {}
+    cumulative = np.concatenate(([0], np.cumsum(counts)))
+    estimates = np.interp([p / 100 * total for p in SCORE_PERCENTILES], cumulative, edges)
+    return {f"p{p}": round(float(v), 2) for p, v in zip(SCORE_PERCENTILES, estimates)}
+
+
+# 成绩分布：直方图和百分位均由统计汇总表中的细分组计数得到
+def score_distribution(db: Session) -> Dict[str, dict]:
+    counters = _read_counters(db)
+    distribution = {}
+    for column in SCORE_COLUMNS:
+        edges = _EDGES[column]
+        counts = np.array([counters.get(_bin_name(column, i), 0) for i in range(len(edges) - 1)])
+        group = HISTOGRAM_GROUP[column]
+        histogram: List[dict] = [
+            {
+                "range": [round(float(edges[i]), 2), round(float(edges[min(i + group, len(edges) - 1)]), 2)],
+                "count": int(counts[i:i + group].sum())
+            }
+            for i in range(0, len(counts), group)
+        ]
+        distribution[column] = {
+            "count": int(counters.get(f"{column}_count", 0)),
+            "histogram": histogram,
+            "percentiles": _estimate_percentiles(counts, edges)
+        }
+    return distribution
+
+
+# 参与统计的学生属性
+TRACKED_ATTRIBUTES = ("gender",) + SCORE_COLUMNS
+
+
+def _history_value(state, key: str, new: bool, committed: Dict[str, object]):
+    history = state.attrs[key].history
+    if new and history.added:
+        return history.added[0]
+    if not new and history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    # 属性已过期或未加载（如提交后再修改）：使用flush前从数据库读取的已提交值，未修改的属性新旧值相同
+    return committed.get(key)
+
+
+def _state_counters(state, new: bool, committed: Dict[str, object]) -> Dict[str, float]:
+    return profile_counters(
+        _history_value(state, "gender", new, committed),
+        {column: _history_value(state, column, new, committed) for column in SCORE_COLUMNS}
+    )
+
+
+# 修改历史中缺少旧值的学生（属性已过期或未加载），在flush前一次性读取其已提交的值
+@event.listens_for(Session, "before_flush")
+def _load_committed_values(session, flush_context, instances):
+    missing = []
+    for obj in session.dirty | session.deleted:
+        if not isinstance(obj, StudentProfile):
+            continue
+        state = inspect(obj)
+        if state.key is None:
+            continue
+        for key in TRACKED_ATTRIBUTES:
+            history = state.attrs[key].history
+            if not history.deleted and not history.unchanged:
+                missing.append(state.identity[0])
+                break
+    if missing:
+        committed = session.info.setdefault("statistics_committed", {})
+        for row in session.execute(
+            select(StudentProfile.id, *[getattr(StudentProfile, key) for key in TRACKED_ATTRIBUTES])
+            .where(StudentProfile.id.in_(missing))
+        ):
+            committed[row.id] = {key: getattr(row, key) for key in TRACKED_ATTRIBUTES}
+
+
+# 在同一事务中增量更新统计汇总：flush时根据修改前后的值计算变化量，flush完成后写入
+@event.listens_for(Session, "after_flush")
+def _track_statistics_changes(session, flush_context):
+    deltas = session.info.setdefault("statistics_delta", defaultdict(float))
+    committed_values = session.info.pop("statistics_committed", {})
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, StudentProfile):
+            continue
+        state = inspect(obj)
+        committed = committed_values.get(state.identity[0], {}) if state.key is not None else {}
+        if obj not in session.new:
+            for name, value in _state_counters(state, False, committed).items():
+                deltas[name] -= value
+        if obj not in session.deleted:
+            for name, value in _state_counters(state, True, committed).items():
+                deltas[name] += value
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _sync_statistics(session, flush_context):
+    deltas = session.info.pop("statistics_delta", None)
+    if deltas:
+        _apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_statistics_changes(session):
+    session.info.pop("statistics_delta", None)
+    session.info.pop("statistics_committed", None)
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "rebuild":
+        with engine.begin() as connection:
+            rebuild_statistics(connection)
+        print("学生统计汇总已重建")
+    elif command == "check":
+        with engine.connect() as connection:
+            mismatches = check_statistics(connection)
+        for name, (stored, expected) in sorted(mismatches.items()):
+            print(f"{name}: 汇总表 {stored}，实际 {expected}")
+        print("学生统计汇总一致" if not mismatches else f"共 {len(mismatches)} 项不一致，可执行 rebuild 重建")
+        sys.exit(1 if mismatches else 0)
+    else:
+        print("用法: python -m utils.statistics [check|rebuild]")
+        sys.exit(2)